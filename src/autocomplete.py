@@ -0,0 +1,186 @@
+'''
+The autocomplete module provides in-memory prefix suggestions for film titles,
+genres and actor names. Indexes are sorted arrays searched with bisect and are
+built once per session from the catalog. Suggestions are offered through
+tab completion in console prompts (or, where readline is unavailable as on
+Windows, by ending the input with '?') and from the command line:
+
+    python -m src.autocomplete title acad
+'''
+
+import bisect
+import sys
+from . import catalog
+from . import fuzzy_search
+from . import settings
+
+try:
+    import readline
+except ImportError:
+    readline = None
+
+
+KINDS = ['title', 'genre', 'actor', 'first_name', 'last_name']
+
+HINT = '(Tab to complete)' if readline is not None else "(end with '?' for suggestions)"
+
+_indexes = {}
+_indexes_generation = None
+
+
+class PrefixIndex:
+    '''
+    Sorted array of (normalized key, value) pairs supporting prefix lookups.
+    Every word position of a value is indexed, so 'WAY' suggests 'JOHN WAYNE'.
+    '''
+
+    def __init__(self, values: list[str]):
+        entries = set()
+        for value in values:
+            words = value.split()
+            for i in range(len(words)):
+                entries.add((' '.join(words[i:]).casefold(), value))
+
+        self._entries = sorted(entries)
+        self._keys = [key for key, _ in self._entries]
+        self.values = sorted(set(values))
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[str]:
+        '''
+        Returns up to `limit` distinct values having a word sequence starting with `prefix`.
+        Values whose beginning matches come first.
+        '''
+
+        prefix = ' '.join(prefix.split()).casefold()
+        if not prefix:
+            return []
+
+        start = bisect.bisect_left(self._keys, prefix)
+        leading, inner = {}, {}
+        for i in range(start, len(self._entries)):
+            key, value = self._entries[i]
+            if not key.startswith(prefix) or len(leading) >= limit:
+                break
+            target = leading if value.casefold().startswith(prefix) else inner
+            target[value] = None
+
+        suggestions = list(leading) + [value for value in inner if value not in leading]
+        return suggestions[:limit]
+
+
+def get_index(conn, kind: str) -> PrefixIndex:
+    '''
+    Returns the session's prefix index for one of KINDS.
+    Indexes are rebuilt when the catalog has been refreshed.
+    '''
+
+    global _indexes_generation
+
+    if _indexes_generation != catalog.generation():
+        _indexes.clear()
+        _indexes_generation = catalog.generation()
+
+    if kind not in _indexes:
+        if kind == 'title':
+            values = [title for _, title in catalog.get_titles(conn)]
+        elif kind == 'genre':
+            values = catalog.get_genres_and_year_range(conn)[0]
+        elif kind == 'actor':
+            values = catalog.get_actor_names(conn)
+        elif kind == 'first_name':
+            values = {name.split()[0] for name in catalog.get_actor_names(conn)}
+        elif kind == 'last_name':
+            values = {name.split()[-1] for name in catalog.get_actor_names(conn)}
+        else:
+            raise ValueError(f'Unknown autocomplete kind "{kind}"')
+        _indexes[kind] = PrefixIndex(values)
+
+    return _indexes[kind]
+
+
+def suggest(conn, kind: str, prefix: str, limit: int = 10) -> list[str]:
+    '''
+    Returns prefix suggestions of the given kind.
+    '''
+
+    return get_index(conn, kind).suggest(prefix, limit)
+
+
+def prompt(text: str, conn, kind: str) -> str:
+    '''
+    Reads a line of input with tab completion from the given index.
+    Falls back to prompt_with_hints where readline is unavailable.
+    '''
+
+    if readline is None:
+        return prompt_with_hints(text, conn, kind)
+
+    index = get_index(conn, kind)
+
+    def complete(line: str, state: int):
+        suggestions = index.suggest(line)
+        return suggestions[state] if state < len(suggestions) else None
+
+    previous_completer = readline.get_completer()
+    previous_delims = readline.get_completer_delims()
+    readline.set_completer(complete)
+    readline.set_completer_delims('')
+    readline.parse_and_bind('tab: complete')
+    try:
+        return input(text)
+    finally:
+        readline.set_completer(previous_completer)
+        readline.set_completer_delims(previous_delims)
+
+
+def prompt_with_hints(text: str, conn, kind: str) -> str:
+    '''
+    Reads a line of input without readline. Input ending in '?' lists the suggestions
+    for the text before it and asks again. Input matching no value shows the closest
+    values (see fuzzy_search.closest_matches) and asks again; an empty answer keeps it.
+    '''
+
+    typed = None
+    while True:
+        line = input(text)
+        stripped = line.strip()
+
+        if stripped.endswith('?'):
+            suggestions = suggest(conn, kind, stripped[:-1])
+            print(f'Suggestions: {", ".join(suggestions)}' if suggestions else 'No suggestions.')
+            continue
+
+        if not stripped and typed is not None:
+            return typed
+
+        if typed is None and stripped and not suggest(conn, kind, stripped, limit=1):
+            close = fuzzy_search.closest_matches(stripped, get_index(conn, kind).values)
+            if close:
+                print(f'Did you mean: {", ".join(close)}? (press Enter to keep "{stripped}")')
+                typed = line
+                continue
+
+        return line
+
+
+def main(argv: list[str]) -> int:
+    '''
+    Prints suggestions for `<kind> <prefix>` one per line.
+    Returns the process exit code.
+    '''
+
+    if len(argv) < 2 or argv[0] not in KINDS:
+        print(f'Usage: python -m src.autocomplete {{{"|".join(KINDS)}}} <prefix>', file=sys.stderr)
+        return 2
+
+    conn = settings.create_mysql_connection()
+    try:
+        for value in suggest(conn, argv[0], ' '.join(argv[1:])):
+            print(value)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,215 @@
+'''
+The catalog module caches film catalog data and metadata from film_extended_view
+for the lifetime of the session, so menus and in-memory indexes do not re-query MySQL.
+
+The catalog is also persisted as an on-disk snapshot. `warm_up` maps the snapshot
+into memory at startup (sections are decoded lazily on first use) and validates it
+in the background against the base tables' MAX(last_update) and row counts,
+rebuilding it from MySQL when it is stale.
+
+Snapshot file layout:
+    magic (6 bytes) | format version (uint16) | header length (uint32) | JSON header | sections
+The JSON header holds the catalog fingerprint and the (offset, length) of every
+JSON-encoded section relative to the end of the header.
+'''
+
+import json
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from . import mysql_connector
+from . import settings
+from . import errors
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SNAPSHOT_FILE = BASE_DIR / 'cache' / 'catalog.snapshot'
+SNAPSHOT_MAGIC = b'SAKCAT'
+SNAPSHOT_VERSION = 1
+_PREAMBLE = struct.Struct('<6sHI')
+
+LOADERS = {
+    'titles': mysql_connector.get_film_titles,
+    'actors': mysql_connector.get_actor_names,
+    'genres_and_year_range': mysql_connector.get_genres_and_year_range,
+    'length_range': mysql_connector.get_length_range
+}
+
+_catalog = {}
+_snapshot = None
+_generation = 0
+
+
+class Snapshot:
+    '''
+    Memory-mapped catalog snapshot with lazily decoded sections.
+    '''
+
+    def __init__(self, path: Path):
+        self._lock = threading.Lock()
+        with open(path, 'rb') as f:
+            self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_length = _PREAMBLE.unpack_from(self._mapped, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self._mapped.close()
+            raise ValueError(f'Unsupported catalog snapshot: {path}')
+
+        header_end = _PREAMBLE.size + header_length
+        header = json.loads(self._mapped[_PREAMBLE.size:header_end])
+        self.fingerprint = header['fingerprint']
+        self._sections = {
+            name: (header_end + offset, header_end + offset + length)
+            for name, (offset, length) in header['sections'].items()
+        }
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sections
+
+    def read(self, name: str):
+        '''
+        Decodes a single section.
+        Raises ValueError if the snapshot has been closed.
+        '''
+
+        start, end = self._sections[name]
+        with self._lock:
+            return json.loads(self._mapped[start:end])
+
+    def close(self) -> None:
+        '''
+        Unmaps the file, so it can be replaced (Windows refuses to replace a mapped file).
+        '''
+
+        with self._lock:
+            self._mapped.close()
+
+
+def write_snapshot(path: Path, fingerprint: dict, sections: dict) -> None:
+    '''
+    Writes a catalog snapshot atomically.
+    Args:
+        path (Path): Target file.
+        fingerprint (dict): Catalog fingerprint (see mysql_connector.get_catalog_fingerprint).
+        sections (dict): Section name to JSON-serializable value.
+    '''
+
+    encoded = {name: json.dumps(value, default=str).encode('utf-8') for name, value in sections.items()}
+
+    offsets, offset = {}, 0
+    for name, data in encoded.items():
+        offsets[name] = (offset, len(data))
+        offset += len(data)
+
+    header = json.dumps({'fingerprint': fingerprint, 'sections': offsets}).encode('utf-8')
+
+    path.parent.mkdir(exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header)))
+        f.write(header)
+        for data in encoded.values():
+            f.write(data)
+    os.replace(tmp_path, path)
+
+
+@errors.log_error(display=False)
+def _refresh_snapshot() -> None:
+    '''
+    Validates the snapshot against MySQL and rebuilds it if stale.
+    Runs on its own connection, as pymysql connections are not thread-safe.
+    '''
+
+    global _catalog, _snapshot, _generation
+
+    conn = settings.create_mysql_connection()
+    try:
+        fingerprint = mysql_connector.get_catalog_fingerprint(conn)
+        if _snapshot is not None and _snapshot.fingerprint == fingerprint:
+            return
+
+        sections = {name: loader(conn) for name, loader in LOADERS.items()}
+    finally:
+        conn.close()
+
+    # Swap the in-memory catalog first, so a failed write still leaves it current.
+    previous, _catalog, _snapshot = _snapshot, sections, None
+    _generation += 1
+
+    if previous is not None:
+        previous.close()
+    write_snapshot(SNAPSHOT_FILE, fingerprint, sections)
+
+
+def warm_up() -> threading.Thread:
+    '''
+    Opens the on-disk snapshot, if any, and starts its background validation.
+    Returns the validation thread, or None if snapshots are disabled.
+    '''
+
+    global _snapshot
+
+    if not settings.CATALOG_SNAPSHOT_ENABLED:
+        return None
+
+    if SNAPSHOT_FILE.exists():
+        try:
+            _snapshot = Snapshot(SNAPSHOT_FILE)
+        except (ValueError, struct.error, json.JSONDecodeError):
+            _snapshot = None
+
+    thread = threading.Thread(target=_refresh_snapshot, daemon=True)
+    thread.start()
+    return thread
+
+
+def generation() -> int:
+    '''
+    Returns a counter that changes whenever the catalog is replaced by a rebuild,
+    so derived indexes know when to rebuild themselves.
+    '''
+
+    return _generation
+
+
+def _load(conn, key: str):
+    catalog, snapshot = _catalog, _snapshot
+
+    if key not in catalog:
+        if snapshot is not None and key in snapshot:
+            try:
+                catalog[key] = snapshot.read(key)
+            except ValueError:
+                if snapshot is _snapshot:
+                    raise
+                # Closed by a concurrent rebuild, which has already swapped in a new catalog.
+                return _load(conn, key)
+        else:
+            catalog[key] = LOADERS[key](conn)
+    return catalog[key]
+
+
+def get_titles(conn) -> list[tuple[int, str]]:
+    '''Returns (film_id, title) pairs for all films.'''
+
+    return _load(conn, 'titles')
+
+
+def get_actor_names(conn) -> list[str]:
+    '''Returns the sorted distinct actor names.'''
+
+    return _load(conn, 'actors')
+
+
+def get_genres_and_year_range(conn) -> tuple[list[str], int, int]:
+    '''Returns the list of genres, minimum year and maximum year.'''
+
+    return _load(conn, 'genres_and_year_range')
+
+
+def get_length_range(conn) -> tuple[int, int]:
+    '''Returns the minimum and maximum film length in minutes.'''
+
+    return _load(conn, 'length_range')
@@ -4,6 +4,7 @@ related to queries and films, using ANSI color codes for terminal output.
 '''
 
 import tabulate
+from .film import Film
 
 def display_query_counts_table(query_counts: dict) -> None:
     '''
@@ -27,6 +28,58 @@ def display_sorted_query_counts_table(data: list[list]) -> None:
     headers = ['Query Type', 'Count']
     print(tabulate.tabulate(data, headers=headers, tablefmt='grid'))
 
+def display_error_rates(rates: list[dict]) -> None:
+    '''
+    Displays per-handler call and error statistics.
+    Args:
+        rates (list of dict): Entries as returned by log_stats.get_error_rates.
+    Returns:
+        None
+    '''
+
+    if not rates:
+        print('\nNo data to display.')
+        return
+
+    table = [
+        [
+            item['function'],
+            item['calls'],
+            item['errors'],
+            f"{item['error_rate']:.1%}",
+            f"{item['avg_duration_ms']:.1f}" if item['avg_duration_ms'] is not None else '—',
+            item['top_exception'] or ''
+        ]
+        for item in rates
+    ]
+    headers = ['Handler', 'Calls', 'Errors', 'Error Rate', 'Avg ms', 'Top Exception']
+    print(tabulate.tabulate(table, headers=headers, tablefmt='grid'))
+
+def display_trend_series(series: list[tuple], granularity: str = 'day') -> None:
+    '''
+    Displays a trend series as a table with one row per period
+    and one column per key.
+    Args:
+        series (list of tuple): (period_start, {key: count}) pairs,
+                                as returned by log_stats.get_trend_series.
+        granularity (str): 'hour', 'day' or 'month', used to format periods.
+    Returns:
+        None
+    '''
+
+    keys = sorted({key for _, counts in series for key in counts})
+    if not keys:
+        print('\nNo data to display.')
+        return
+
+    formats = {'hour': '%Y-%m-%d %H:00', 'day': '%Y-%m-%d', 'month': '%Y-%m'}
+    table = [
+        [start.strftime(formats[granularity])] + [counts.get(key, 0) for key in keys] + [sum(counts.values())]
+        for start, counts in series
+    ]
+    headers = ['Period'] + keys + ['Total']
+    print(tabulate.tabulate(table, headers=headers, tablefmt='grid'))
+
 COLORS = {
     'yellow': '\033[93m',
     'blue': '\033[94m',
@@ -109,7 +162,16 @@ def display_top_parameters(top_params: list[tuple[str, int]]) -> None:
     print(tabulate.tabulate(table, headers=headers, tablefmt='grid'))
 
 
-def display_films_table(films: list[dict], highlight_name: str = '') -> None:
+def display_films_table(films: list[Film | dict], highlight_name: str = '') -> None:
+    '''
+    Displays a formatted table of films.
+    Args:
+        films (list): Film records (or dict rows with the same keys).
+        highlight_name (str): Actors matching this name are listed first.
+    Returns:
+        None
+    '''
+
     if not films:
         print('\nNo films found.')
         return
@@ -119,7 +181,10 @@ def display_films_table(films: list[dict], highlight_name: str = '') -> None:
         actors = film.get('actors', '')
 
         if highlight_name and highlight_name.lower() in actors.lower():
-            actors_list = [a.strip() for a in actors.split(',')]
+            if isinstance(film, Film):
+                actors_list = film.actor_list
+            else:
+                actors_list = [a.strip() for a in actors.split(',')]
             main = [a for a in actors_list if highlight_name.lower() in a.lower()]
             others = [a for a in actors_list if highlight_name.lower() not in a.lower()]
             actors = ', '.join(main + others)
@@ -139,3 +204,29 @@ def display_films_table(films: list[dict], highlight_name: str = '') -> None:
 
     headers = ['ID', 'Title', 'Description', 'Year', 'Length', 'Rating', 'Actors']
     print(tabulate.tabulate(table, headers=headers, tablefmt='grid'))
+
+
+def display_dashboard(dashboard: dict) -> None:
+    '''
+    Displays all query statistics from a dashboard payload together.
+    Args:
+        dashboard (dict): Payload as returned by log_stats.get_dashboard.
+    Returns:
+        None
+    '''
+
+    generated_at = dashboard['generated_at'].strftime('%Y-%m-%d %H:%M:%S')
+    print(colorize(f'\n=== Dashboard (generated {generated_at} UTC) ===', 'yellow'))
+
+    print('\nTop popular parameters:')
+    display_top_parameters(dashboard['top_parameters'])
+
+    print('\nLast queries:')
+    display_queries_table(dashboard['last_queries'])
+
+    for query_type, queries in sorted(dashboard['queries_by_type'].items(), key=lambda x: str(x[0])):
+        print(f'\nQueries of type "{query_type}":')
+        display_queries_table(queries)
+
+    print('\nFrequency by query type:')
+    display_sorted_query_counts_table(dashboard['query_counts'])
@@ -3,26 +3,11 @@ Module errors provides decorators and functions to log and display errors
 consistently during program execution.
 '''
 
+import time
 from functools import wraps
-from datetime import datetime
-from pathlib import Path
 from typing import Callable, Optional
 from .display_utils import colorize
-
-
-BASE_DIR = Path(__file__).resolve().parent.parent
-LOG_DIR = BASE_DIR / 'logs'
-LOG_FILE = LOG_DIR / 'error.log'
-
-def log_error_to_file(message: str) -> None:
-    '''
-    Writes an error message to the log file with a timestamp.
-    '''
-    LOG_DIR.mkdir(exist_ok=True)
-
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    with open(LOG_FILE, 'a', encoding='utf-8') as f:
-        f.write(f'[{timestamp}] {message}\n')
+from . import event_log
 
 
 def show_error(message: str) -> None:
@@ -33,13 +18,23 @@ def show_error(message: str) -> None:
     print(colorize(message, 'red'))
 
 
-def log_error(display: bool = True, rethrow: bool = False) -> Callable:
+def _duration(start: float, timed: bool) -> dict:
+    '''Returns the duration_ms event field for a call started at `start`, if timed.'''
+
+    return {'duration_ms': round((time.perf_counter() - start) * 1000, 3)} if timed else {}
+
+
+def log_error(display: bool = True, rethrow: bool = False, timed: bool = True) -> Callable:
     '''
     Decorator for logging exceptions during function execution.
+    Every call is recorded in the structured event log with the function name,
+    duration (if timed) and, on failure, the exception type and message.
 
     Args:
         display (bool): Show error message in console.
         rethrow (bool): Re-raise exception after logging.
+        timed (bool): Record the call duration. Disable for handlers that wait
+                      for user input, whose duration is mostly typing time.
 
     Returns:
         Callable: Wrapped function.
@@ -48,13 +43,18 @@ def log_error(display: bool = True, rethrow: bool = False) -> Callable:
     def decorator(func: Callable):
         @wraps(func)
         def wrapper(*args, **kwargs):
+            start = time.perf_counter()
             try:
-                return func(*args, **kwargs)
+                result = func(*args, **kwargs)
             except Exception as e:
-                error_message = (
-                    f'{type(e).__name__} in {func.__name__}: {e}'
+                event_log.log_event(
+                    'call',
+                    function=func.__name__,
+                    status='error',
+                    exception_type=type(e).__name__,
+                    message=str(e),
+                    **_duration(start, timed)
                 )
-                log_error_to_file(error_message)
 
                 if display:
                     show_error(f'Error: {e}')
@@ -64,6 +64,14 @@ def log_error(display: bool = True, rethrow: bool = False) -> Callable:
 
                 return None
 
+            event_log.log_event(
+                'call',
+                function=func.__name__,
+                status='ok',
+                **_duration(start, timed)
+            )
+            return result
+
         return wrapper
 
     return decorator
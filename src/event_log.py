@@ -0,0 +1,188 @@
+'''
+Module event_log provides a structured JSON-lines event log for the application.
+Events are handed to a background writer thread and stored in a rotating,
+gzip-compressed set of files under the logs directory.
+'''
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from pathlib import Path
+from typing import Iterator
+from . import settings
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+LOG_DIR = BASE_DIR / 'logs'
+EVENT_LOG_FILE = LOG_DIR / 'events.jsonl'
+
+_LOGGER_NAME = 'sakila.events'
+FLUSH_TIMEOUT_SECONDS = 5
+_listener = None
+_listener_lock = threading.Lock()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    '''
+    Formats a log record whose message is a dict as a single JSON line.
+    '''
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            **record.msg
+        }
+        return json.dumps(event, default=str, ensure_ascii=False)
+
+
+class _FlushHandler(logging.Handler):
+    '''
+    Signals a flush marker once the writer thread reaches it, i.e. once every
+    event queued before the marker has been written.
+    '''
+
+    def emit(self, record: logging.LogRecord) -> None:
+        flushed = getattr(record, 'flushed', None)
+        if flushed is not None:
+            flushed.set()
+
+
+def _is_event(record: logging.LogRecord) -> bool:
+    '''Keeps flush markers out of the log file.'''
+
+    return not hasattr(record, 'flushed')
+
+
+def _gzip_namer(name: str) -> str:
+    '''Appends the .gz suffix to rotated file names.'''
+
+    return f'{name}.gz'
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    '''Compresses the rotated log file and removes the uncompressed original.'''
+
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def _create_file_handler() -> logging.Handler:
+    '''
+    Creates the file handler according to EVENT_LOG_ROTATION:
+    'size' rotates by EVENT_LOG_MAX_BYTES, any other value is passed to
+    TimedRotatingFileHandler as the `when` interval (e.g. 'midnight', 'H').
+    '''
+
+    LOG_DIR.mkdir(exist_ok=True)
+
+    if settings.EVENT_LOG_ROTATION == 'size':
+        handler = RotatingFileHandler(
+            EVENT_LOG_FILE,
+            maxBytes=settings.EVENT_LOG_MAX_BYTES,
+            backupCount=settings.EVENT_LOG_BACKUP_COUNT,
+            encoding='utf-8'
+        )
+    else:
+        handler = TimedRotatingFileHandler(
+            EVENT_LOG_FILE,
+            when=settings.EVENT_LOG_ROTATION,
+            backupCount=settings.EVENT_LOG_BACKUP_COUNT,
+            encoding='utf-8',
+            utc=True
+        )
+
+    handler.namer = _gzip_namer
+    handler.rotator = _gzip_rotator
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    handler.addFilter(_is_event)
+    return handler
+
+
+def _get_logger() -> logging.Logger:
+    '''
+    Returns the event logger, starting the background writer on first use.
+    The start is serialized, since decorated functions also run on background threads,
+    and the queue handler is attached only once the writer is running.
+    '''
+
+    global _listener
+
+    logger = logging.getLogger(_LOGGER_NAME)
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                event_queue = queue.SimpleQueue()
+                listener = QueueListener(event_queue, _create_file_handler(), _FlushHandler())
+                listener.start()
+                atexit.register(listener.stop)
+
+                queue_handler = QueueHandler(event_queue)
+                queue_handler.setFormatter(JsonLinesFormatter())
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                logger.addHandler(queue_handler)
+                _listener = listener
+
+    return logger
+
+
+def log_event(event: str, **fields) -> None:
+    '''
+    Queues a structured event for writing to the event log.
+    Args:
+        event (str): Event name, e.g. 'call'.
+        **fields: Additional JSON-serializable fields stored with the event.
+    Returns:
+        None
+    '''
+
+    _get_logger().info({'event': event, **fields})
+
+
+def flush() -> None:
+    '''
+    Blocks until all queued events have been written to disk
+    (at most FLUSH_TIMEOUT_SECONDS, e.g. if the writer has already stopped at exit).
+    '''
+
+    listener = _listener
+    if listener is None:
+        return
+
+    flushed = threading.Event()
+    listener.queue.put_nowait(logging.makeLogRecord({'msg': {}, 'flushed': flushed}))
+    flushed.wait(FLUSH_TIMEOUT_SECONDS)
+
+
+def read_events(event: str = None) -> Iterator[dict]:
+    '''
+    Reads events from the current and rotated (compressed) log files,
+    oldest file first. Malformed lines are skipped.
+    Args:
+        event (str, optional): Only yield events with this name.
+    Returns:
+        Iterator of event dicts.
+    '''
+
+    flush()
+
+    files = sorted(LOG_DIR.glob(f'{EVENT_LOG_FILE.name}*'), key=lambda p: p.stat().st_mtime)
+
+    for path in files:
+        opener = gzip.open if path.suffix == '.gz' else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if event is None or entry.get('event') == event:
+                    yield entry
@@ -0,0 +1,226 @@
+'''
+The fuzzy_search module provides typo-tolerant keyword search over film titles.
+A trigram index over normalized title words is built once per session to find
+candidate titles; candidates are ranked by matching every query word against its
+closest title word by edit distance, so that "DINASOUR" still finds "ACADEMY DINOSAUR".
+'''
+
+import heapq
+import re
+import time
+from collections import Counter, defaultdict
+from . import catalog
+from . import mysql_connector
+from . import settings
+
+
+_title_index = None
+_title_index_generation = None
+
+
+def normalize(text: str) -> str:
+    '''
+    Uppercases text and replaces every non-alphanumeric run with a single space.
+    '''
+
+    return ' '.join(re.sub(r'[^0-9A-Z]+', ' ', text.upper()).split())
+
+
+def trigrams(text: str) -> set[str]:
+    '''
+    Returns the set of trigrams of the words in a normalized text.
+    Words are padded, so word starts and ends form their own trigrams.
+    '''
+
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def edit_distance(a: str, b: str) -> int:
+    '''
+    Returns the Levenshtein distance between two strings.
+    '''
+
+    if len(a) < len(b):
+        a, b = b, a
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def word_similarity(query_word: str, title_word: str) -> float:
+    '''
+    Returns 1.0 if the query word occurs in the title word, otherwise
+    1 - edit distance / length of the longer word.
+    '''
+
+    if query_word in title_word:
+        return 1.0
+    return 1 - edit_distance(query_word, title_word) / max(len(query_word), len(title_word))
+
+
+def words_score(query_words: list[str], title_words: list[str]) -> float:
+    '''
+    Returns the mean over query words of the similarity to the closest title word.
+    '''
+
+    return sum(
+        max(word_similarity(word, title_word) for title_word in title_words)
+        for word in query_words
+    ) / len(query_words)
+
+
+def closest_matches(query: str, values, limit: int = 3, min_score: float = None) -> list[str]:
+    '''
+    Returns up to `limit` values closest to the query, best match first,
+    scored like TrigramIndex.search. Meant for "Did you mean" hints over short lists.
+    Args:
+        query (str): Text as typed by the user.
+        values (iterable of str): Candidate values, e.g. genre names.
+        limit (int): Maximum number of values.
+        min_score (float, optional): Minimum score. Defaults to FUZZY_MIN_SCORE.
+    '''
+
+    if min_score is None:
+        min_score = settings.FUZZY_MIN_SCORE
+
+    query_words = normalize(query).split()
+    if not query_words:
+        return []
+
+    scored = []
+    for value in values:
+        value_words = normalize(value).split()
+        if value_words:
+            score = words_score(query_words, value_words)
+            if score >= min_score:
+                scored.append((score, value))
+
+    return [value for _, value in heapq.nlargest(limit, scored, key=lambda item: item[0])]
+
+
+class TrigramIndex:
+    '''
+    Inverted index from title trigrams to films.
+    '''
+
+    def __init__(self, titles: list[tuple[int, str]]):
+        '''
+        Args:
+            titles (list of tuple): (film_id, title) pairs.
+        '''
+
+        self._film_ids = []
+        self._titles = []
+        self._words = []
+        self._sizes = []
+        self._postings = defaultdict(list)
+
+        for film_id, title in titles:
+            normalized = normalize(title)
+            grams = trigrams(normalized)
+            doc = len(self._film_ids)
+
+            self._film_ids.append(film_id)
+            self._titles.append(normalized)
+            self._words.append(normalized.split())
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(doc)
+
+    def search(self, query: str, k: int, min_score: float = 0.6,
+               budget_ms: float = 50) -> list[tuple[int, float]]:
+        '''
+        Returns the top-k films for a query.
+        Titles sharing a trigram with the query are candidates. A candidate's score is
+        1.0 for substring matches, otherwise the mean over query words of the
+        similarity to the closest title word (see word_similarity); ties are broken
+        by overall trigram similarity, then by film ID. Postings are scanned rarest
+        trigram first, and scanning and scoring stop once the latency budget is spent,
+        so results degrade gracefully on very long queries.
+        Args:
+            query (str): Search text.
+            k (int): Number of results.
+            min_score (float): Minimum score of returned films.
+            budget_ms (float): Latency budget in milliseconds.
+        Returns:
+            List of (film_id, score) tuples, best match first.
+        '''
+
+        deadline = time.perf_counter() + budget_ms / 1000
+        normalized = normalize(query)
+        grams = trigrams(normalized)
+        if not grams:
+            return []
+
+        shared = Counter()
+        for gram in sorted(grams, key=lambda g: len(self._postings.get(g, ()))):
+            shared.update(self._postings.get(gram, ()))
+            if time.perf_counter() > deadline:
+                break
+
+        query_words = normalized.split()
+        scored = []
+        for doc, count in shared.most_common():
+            if normalized in self._titles[doc]:
+                score = 1.0
+            else:
+                if time.perf_counter() > deadline:
+                    break
+                score = words_score(query_words, self._words[doc])
+            if score < min_score:
+                continue
+            similarity = 2 * count / (len(grams) + self._sizes[doc])
+            scored.append((score, similarity, -self._film_ids[doc]))
+
+        return [(-neg_film_id, score) for score, _, neg_film_id in heapq.nlargest(k, scored)]
+
+
+def get_title_index(conn) -> TrigramIndex:
+    '''
+    Returns the session's title index, building it on first use
+    and rebuilding it when the catalog has been refreshed.
+    '''
+
+    global _title_index, _title_index_generation
+
+    if _title_index is None or _title_index_generation != catalog.generation():
+        _title_index_generation = catalog.generation()
+        _title_index = TrigramIndex(catalog.get_titles(conn))
+    return _title_index
+
+
+def search_by_keyword(conn, keyword, offset=0, limit=10):
+    '''
+    Search films by keyword in the title, tolerating typos.
+    Falls back to mysql_connector.search_by_keyword (LIKE %keyword%) when
+    FUZZY_SEARCH_ENABLED is off or the keyword is shorter than 3 characters.
+    keyword: Keyword for searching.
+    offset: Offset for pagination.
+    limit: Number of records to return.
+    return: List of films, best match first.
+    '''
+
+    if not settings.FUZZY_SEARCH_ENABLED or len(normalize(keyword)) < 3:
+        return mysql_connector.search_by_keyword(conn, keyword, offset, limit)
+
+    ranked = get_title_index(conn).search(
+        keyword,
+        offset + limit,
+        min_score=settings.FUZZY_MIN_SCORE,
+        budget_ms=settings.FUZZY_LATENCY_BUDGET_MS
+    )
+    film_ids = [film_id for film_id, _ in ranked[offset:offset + limit]]
+    return mysql_connector.get_films_by_ids(conn, film_ids)
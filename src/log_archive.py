@@ -0,0 +1,209 @@
+'''
+The log_archive module moves old query logs from MongoDB into compressed
+JSON-lines segment files on local disk and reads them back.
+Segments store logs newest first, so recent logs can be streamed without
+decoding a whole segment. Each segment is summarized in `index.json` (document
+count, time range, counts per query type and per parameter), so readers can skip segments or
+answer counts without decompressing them. Run the archival job with `python -m src.log_archive`.
+'''
+
+import gzip
+import json
+import mmap
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+from bson import ObjectId
+from . import settings
+from . import stats_cache
+from .log_writer import param_items
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARCHIVE_DIR = BASE_DIR / 'archive'
+INDEX_FILE = ARCHIVE_DIR / 'index.json'
+
+
+def load_index() -> list[dict]:
+    '''
+    Returns the segment summaries, oldest segment first.
+    '''
+
+    if not INDEX_FILE.exists():
+        return []
+    with open(INDEX_FILE, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_index(index: list[dict]) -> None:
+    tmp_file = INDEX_FILE.with_suffix('.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_file, INDEX_FILE)
+
+
+def _encode(doc: dict) -> str:
+    return json.dumps({
+        '_id': str(doc['_id']),
+        'query_type': doc.get('query_type'),
+        'params': doc.get('params') or {},
+        'timestamp': doc['timestamp'].isoformat()
+    }, ensure_ascii=False)
+
+
+def _decode(line: bytes) -> dict:
+    doc = json.loads(line)
+    doc['_id'] = ObjectId(doc['_id'])
+    doc['timestamp'] = datetime.fromisoformat(doc['timestamp'])
+    return doc
+
+
+def _write_segment(docs: list[dict]) -> dict:
+    '''
+    Writes one segment file, newest log first, and returns its summary.
+    Args:
+        docs (list of dict): Logs sorted by timestamp ascending.
+    '''
+
+    first, last = docs[0]['timestamp'], docs[-1]['timestamp']
+    name = f"segment-{first:%Y%m%dT%H%M%S}-{last:%Y%m%dT%H%M%S}-{docs[-1]['_id']}.jsonl.gz"
+    path = ARCHIVE_DIR / name
+
+    tmp_path = path.with_suffix('.tmp')
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        for doc in reversed(docs):
+            f.write(_encode(doc) + '\n')
+    os.replace(tmp_path, path)
+
+    return {
+        'file': name,
+        'count': len(docs),
+        'min_timestamp': first.isoformat(),
+        'max_timestamp': last.isoformat(),
+        'query_types': dict(Counter(doc.get('query_type') for doc in docs)),
+        'parameters': dict(Counter(item for doc in docs for item in param_items(doc)))
+    }
+
+
+def _delete_archived(collection, index: list[dict], segment: dict, ids: list) -> None:
+    '''
+    Deletes a segment's documents from MongoDB and clears its 'pending_delete' flag.
+    '''
+
+    collection.delete_many({'_id': {'$in': ids}})
+    del segment['pending_delete']
+    _save_index(index)
+
+
+def archive_logs(older_than_days: int = None) -> int:
+    '''
+    Moves query logs older than the cutoff from MongoDB into segment files.
+    A segment and its index entry (flagged 'pending_delete') are written before the
+    documents are deleted. Deletes left pending by an interrupted run are finished
+    first, so a rerun never archives the same documents twice.
+    Args:
+        older_than_days (int, optional): Cutoff age. Defaults to LOG_ARCHIVE_AFTER_DAYS.
+    Returns:
+        Number of documents removed from MongoDB, including finished pending deletes.
+    '''
+
+    if older_than_days is None:
+        older_than_days = settings.LOG_ARCHIVE_AFTER_DAYS
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    collection = settings.get_mongo_collection()
+    ARCHIVE_DIR.mkdir(exist_ok=True)
+    index = load_index()
+
+    archived = 0
+    for segment in index:
+        if segment.get('pending_delete'):
+            ids = [doc['_id'] for doc in _read_segment(segment['file'])]
+            _delete_archived(collection, index, segment, ids)
+            archived += segment['count']
+
+    while True:
+        docs = list(
+            collection.find({'timestamp': {'$lt': cutoff}})
+            .sort('timestamp', 1)
+            .limit(settings.LOG_ARCHIVE_SEGMENT_SIZE)
+        )
+        if not docs:
+            break
+
+        segment = _write_segment(docs)
+        segment['pending_delete'] = True
+        index.append(segment)
+        _save_index(index)
+        _delete_archived(collection, index, segment, [doc['_id'] for doc in docs])
+        archived += len(docs)
+
+    if archived:
+        stats_cache.bump_generation()
+    return archived
+
+
+def _read_segment(name: str) -> Iterator[dict]:
+    '''
+    Streams the documents of a segment through a memory-mapped gzip decoder.
+    '''
+
+    with open(ARCHIVE_DIR / name, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+            gzip.GzipFile(fileobj=mapped) as decoder:
+        for line in decoder:
+            yield _decode(line)
+
+
+def iter_archived(query_type: str = None, newest_first: bool = False) -> Iterator[dict]:
+    '''
+    Iterates over archived query logs, streaming one segment at a time.
+    Segments without the requested query type are skipped using the index.
+    Args:
+        query_type (str, optional): Only yield logs of this type.
+        newest_first (bool): Yield logs in descending timestamp order.
+                             Otherwise logs come in storage order (segments oldest first,
+                             each segment newest first), which suits counting.
+    Returns:
+        Iterator of query log documents.
+    '''
+
+    segments = load_index()
+    if newest_first:
+        segments = list(reversed(segments))
+
+    for segment in segments:
+        if query_type and not segment['query_types'].get(query_type):
+            continue
+
+        for doc in _read_segment(segment['file']):
+            if query_type is None or doc.get('query_type') == query_type:
+                yield doc
+
+
+def archived_query_counts() -> Counter:
+    '''
+    Returns archived log counts per query type, read from the index only.
+    '''
+
+    counts = Counter()
+    for segment in load_index():
+        counts.update(segment['query_types'])
+    return counts
+
+
+def archived_parameter_counts() -> Counter:
+    '''
+    Returns archived 'query_type.key:value' parameter counts, read from the index only.
+    '''
+
+    counts = Counter()
+    for segment in load_index():
+        counts.update(segment['parameters'])
+    return counts
+
+
+if __name__ == '__main__':
+    print(f'Archived {archive_logs()} query logs.')
@@ -0,0 +1,251 @@
+'''
+The log_spool module delivers query logs to MongoDB without blocking searches.
+Logs are queued and written by a background thread through a circuit breaker.
+While MongoDB is unavailable (or the breaker is open) logs are appended to a
+local JSON-lines spool file, which is bulk re-ingested once MongoDB recovers.
+Spooled lines that cannot be decoded or written are moved to a `.corrupt` file
+and reported to the event log instead of stopping delivery.
+'''
+
+import atexit
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+from . import settings
+from . import event_log
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SPOOL_FILE = BASE_DIR / 'logs' / 'query_spool.jsonl'
+REINGEST_BATCH_SIZE = 1000
+
+
+class CircuitBreaker:
+    '''
+    Stops calls to a failing service for a cool-down period.
+    Closed: calls pass. Open: calls are rejected until `reset_seconds` have passed.
+    Half-open: one trial call passes; success closes the breaker, failure reopens it.
+    '''
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        '''Returns True if a call may be attempted now.'''
+
+        if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self.state = 'half_open'
+        return self.state != 'open'
+
+    def record_success(self) -> None:
+        self.state = 'closed'
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == 'half_open' or self._failures >= self.failure_threshold:
+            self.state = 'open'
+            self._opened_at = time.monotonic()
+
+
+def _encode(doc: dict) -> str:
+    encoded = dict(doc)
+    if '_id' in doc:
+        encoded['_id'] = str(doc['_id'])
+    encoded['timestamp'] = doc['timestamp'].isoformat()
+    return json.dumps(encoded, ensure_ascii=False)
+
+
+def _decode(line: str) -> dict:
+    doc = json.loads(line)
+    if '_id' in doc:
+        doc['_id'] = ObjectId(doc['_id'])
+    doc['timestamp'] = datetime.fromisoformat(doc['timestamp'])
+    return doc
+
+
+class LogDispatcher:
+    '''
+    Background writer for query logs.
+    `write` receives a list of log documents and must raise PyMongoError on failure.
+    A batch may be written again after a partial failure, so `write` must be idempotent,
+    e.g. by inserting documents with a fixed `_id`.
+    '''
+
+    def __init__(self, write: Callable[[list[dict]], None], spool_file: Path = SPOOL_FILE,
+                 breaker: CircuitBreaker = None):
+        self._write = write
+        self.spool_file = spool_file
+        self.breaker = breaker or CircuitBreaker(
+            settings.MONGO_BREAKER_FAILURES,
+            settings.MONGO_BREAKER_RESET_SECONDS
+        )
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, doc: dict) -> None:
+        '''
+        Queues a log document for delivery and returns immediately.
+        '''
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if self._thread is None:
+                    atexit.register(self.stop)
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._queue.put(doc)
+
+    def stop(self, timeout: float = 5) -> None:
+        '''
+        Delivers or spools the queued logs and stops the background thread.
+        '''
+
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            try:
+                doc = self._queue.get(timeout=self.breaker.reset_seconds)
+            except queue.Empty:
+                self._deliver_safely([])
+                continue
+
+            docs, stop = [], doc is None
+            if doc is not None:
+                docs.append(doc)
+            while not stop:
+                try:
+                    doc = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if doc is None:
+                    stop = True
+                else:
+                    docs.append(doc)
+
+            self._deliver_safely(docs)
+            if stop:
+                return
+
+    def _deliver_safely(self, docs: list[dict]) -> None:
+        '''
+        Delivers docs, keeping the thread alive on unexpected errors (spool I/O, decoding).
+        The docs are spooled if possible and dropped only if spooling fails as well.
+        '''
+
+        try:
+            self._deliver(docs)
+        except Exception as e:
+            event_log.log_event(
+                'log_spool_error',
+                stage='deliver',
+                exception_type=type(e).__name__,
+                message=str(e),
+                count=len(docs)
+            )
+            try:
+                self._spool(docs)
+            except Exception as e:
+                event_log.log_event(
+                    'log_spool_error',
+                    stage='spool',
+                    exception_type=type(e).__name__,
+                    message=str(e),
+                    dropped=len(docs)
+                )
+
+    def _deliver(self, docs: list[dict]) -> None:
+        '''
+        Writes docs to MongoDB, re-ingesting the spool first, or spools them.
+        '''
+
+        if self.breaker.allow():
+            try:
+                self._reingest()
+                if docs:
+                    self._write(docs)
+                self.breaker.record_success()
+                return
+            except PyMongoError:
+                self.breaker.record_failure()
+
+        self._spool(docs)
+
+    def _spool(self, docs: list[dict]) -> None:
+        if not docs:
+            return
+
+        self.spool_file.parent.mkdir(exist_ok=True)
+        with open(self.spool_file, 'a', encoding='utf-8') as f:
+            for doc in docs:
+                f.write(_encode(doc) + '\n')
+
+    def _quarantine(self, lines: list[str], stage: str, error: Exception) -> None:
+        '''
+        Moves spool lines that can never be delivered to the `.corrupt` file.
+        '''
+
+        with open(self.spool_file.with_suffix('.corrupt'), 'a', encoding='utf-8') as f:
+            for line in lines:
+                f.write(line.rstrip('\n') + '\n')
+
+        event_log.log_event(
+            'log_spool_error',
+            stage=stage,
+            exception_type=type(error).__name__,
+            message=str(error),
+            quarantined=len(lines)
+        )
+
+    def _reingest(self) -> None:
+        '''
+        Bulk-writes spooled logs to MongoDB in batches.
+        The spool is renamed first, so new failures go to a fresh spool file;
+        logs that still cannot be written are spooled again.
+        Torn or undecodable lines, and batches rejected with a non-MongoDB error,
+        are quarantined so they cannot block later re-ingests.
+        '''
+
+        replay_file = self.spool_file.with_suffix('.replay')
+        if not replay_file.exists():
+            if not self.spool_file.exists():
+                return
+            self.spool_file.rename(replay_file)
+
+        docs = []
+        with open(replay_file, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    docs.append(_decode(line))
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    self._quarantine([line], 'decode', e)
+
+        for start in range(0, len(docs), REINGEST_BATCH_SIZE):
+            batch = docs[start:start + REINGEST_BATCH_SIZE]
+            try:
+                self._write(batch)
+            except PyMongoError:
+                self._spool(docs[start:])
+                replay_file.unlink()
+                raise
+            except Exception as e:
+                self._quarantine([_encode(doc) for doc in batch], 'reingest', e)
+
+        replay_file.unlink()
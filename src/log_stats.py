@@ -4,16 +4,64 @@ from MongoDB.
 '''
 
 import collections
-from datetime import datetime
-from .log_writer import POSSIBLE_KEYS
+import itertools
+import json
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from .log_writer import POSSIBLE_KEYS, param_items
 from . import settings
 from . import display_utils
+from . import event_log
+from . import trends
+from . import log_archive
+from .stats_cache import cached_stats, bump_generation
 
+DASHBOARD_TOP_CANDIDATES = 10
 
+_indexes_ready = False
+
+
+def _ensure_indexes(collection) -> None:
+    '''
+    Creates the indexes used by the recent-queries lookups and the dashboard (once per process).
+    '''
+
+    global _indexes_ready
+
+    if not _indexes_ready:
+        collection.create_index([('timestamp', DESCENDING)])
+        collection.create_index([('query_type', ASCENDING), ('timestamp', DESCENDING)])
+        _indexes_ready = True
+
+
+def _unique_by_params(docs, limit: int, seen: set = None) -> list[dict]:
+    '''
+    Returns up to `limit` docs with distinct params, keeping the first occurrence.
+    '''
+
+    seen = set() if seen is None else seen
+    unique_results = []
+
+    for doc in docs:
+        params_tuple = tuple(sorted((doc.get('params') or {}).items()))
+
+        if params_tuple not in seen:
+            seen.add(params_tuple)
+            unique_results.append(doc)
+
+            if len(unique_results) >= limit:
+                break
+
+    return unique_results
+
+
+@cached_stats
 def get_top_queries(limit: int = 5) -> list[tuple[str, int]]:
     '''
     Collects all parameter values from query_type and params,
     and returns the top most popular combinations.
+    Both live and archived logs are counted (archived counts come from the archive index).
     Args:
         limit (int): Number of top items to return. Defaults to 5.
     Returns:
@@ -23,27 +71,19 @@ def get_top_queries(limit: int = 5) -> list[tuple[str, int]]:
     collection = settings.get_mongo_collection()
     cursor = collection.find({})
 
-    all_items = []
+    counter = log_archive.archived_parameter_counts()
 
     for doc in cursor:
-        query_type = doc.get('query_type')
-        params = doc.get('params', {})
-        if not query_type or not isinstance(params, dict):
-            continue
-
-        for key in POSSIBLE_KEYS:
-            value = params.get(key)
-            if value is not None and value != '':
-                item = f"{query_type}.{key}:{value}".strip().lower()
-                all_items.append(item)
+        counter.update(param_items(doc))
 
-    counter = collections.Counter(all_items)
     return counter.most_common(limit)
 
 
+@cached_stats
 def get_last_queries(limit: int = 10) -> list[dict]:
     '''
-    Fetches the most recent search queries from the logs.
+    Fetches the most recent search queries from the logs,
+    continuing into archived segments if the live collection has fewer than `limit`.
     Args:
         limit (int): Number of recent queries to retrieve. Defaults to 10.
     Returns:
@@ -51,13 +91,21 @@ def get_last_queries(limit: int = 10) -> list[dict]:
     '''
 
     collection = settings.get_mongo_collection()
-    return list(collection.find({}).sort('timestamp', -1).limit(limit))
+    _ensure_indexes(collection)
+    recent = list(collection.find({}).sort('timestamp', -1).limit(limit))
 
+    if len(recent) < limit:
+        recent.extend(itertools.islice(log_archive.iter_archived(newest_first=True), limit - len(recent)))
 
+    return recent
+
+
+@cached_stats
 def get_queries_by_type(query_type: str, limit: int = 5, fetch_limit: int = 100) -> list[dict]:
     '''
     Retrieves up to `limit` unique entries by query_type,
-    uniqueness based on params, from the last `fetch_limit` records.
+    uniqueness based on params, from the last `fetch_limit` records
+    (live records first, then archived ones).
     Args:
         query_type (str): The query type to filter by.
         limit (int): Maximum number of unique results to return. Defaults to 5.
@@ -67,24 +115,45 @@ def get_queries_by_type(query_type: str, limit: int = 5, fetch_limit: int = 100)
     '''
 
     collection = settings.get_mongo_collection()
+    _ensure_indexes(collection)
 
     recent = list(collection.find({'query_type': query_type}).sort('timestamp', -1).limit(fetch_limit))
 
-    unique_params = set()
-    unique_results = []
+    if len(recent) < fetch_limit:
+        archived = log_archive.iter_archived(query_type, newest_first=True)
+        recent.extend(itertools.islice(archived, fetch_limit - len(recent)))
 
-    for doc in recent:
-        params = doc.get('params', {})
-        params_tuple = tuple(sorted(params.items()))
+    return _unique_by_params(recent, limit)
 
-        if params_tuple not in unique_params:
-            unique_params.add(params_tuple)
-            unique_results.append(doc)
 
-            if len(unique_results) >= limit:
-                break
+@cached_stats
+def get_query_counts() -> list[list]:
+    '''
+    Counts logged queries per query type, including archived logs
+    (taken from the archive index without decoding segments).
+    Returns:
+        List of [query_type, count] pairs sorted by count descending.
+    '''
 
-    return unique_results
+    collection = settings.get_mongo_collection()
+
+    pipeline = [
+        {
+            '$group': {
+                '_id': '$query_type',
+                'count': {'$sum': 1}
+            }
+        }
+    ]
+
+    results = list(collection.aggregate(pipeline))
+    counts = log_archive.archived_query_counts()
+    for item in results:
+        counts[item['_id']] += item['count']
+
+    data = [[q_type, count] for q_type, count in counts.items()]
+    data.sort(key=lambda x: x[1], reverse=True)
+    return data
 
 
 def handle_query_count(query_type: str = None, show: bool = False) -> None:
@@ -109,23 +178,343 @@ def handle_query_count(query_type: str = None, show: bool = False) -> None:
                 'query_type': query_type,
                 'timestamp': datetime.utcnow()
             })
+            bump_generation()
         else:
             print(f'Warning: Unknown query type "{query_type}"')
 
     if show:
-        pipeline = [
-            {
-                '$group': {
-                    '_id': '$query_type',
-                    'count': {'$sum': 1}
-                }
-            }
-        ]
+        display_utils.display_sorted_query_counts_table(get_query_counts())
+
+
+def get_top_queries_in_window(hours: int = 24, limit: int = 5,
+                              dimension: str = 'query') -> list[tuple[str, int]]:
+    '''
+    Returns the most frequent keys of a trend dimension within a time window,
+    reading only the pre-aggregated buckets. Hourly buckets are used while they
+    are retained, daily buckets (plus monthly buckets downsampled from them) otherwise.
+    Args:
+        hours (int): Window length in hours, counted back from now. Defaults to 24.
+        limit (int): Number of top items to return. Defaults to 5.
+        dimension (str): One of trends.DIMENSIONS. Defaults to 'query',
+                         whose keys have the 'query_type.key:value' format.
+    Returns:
+        List of tuples (key, count) sorted by count descending.
+    '''
+
+    if dimension not in trends.DIMENSIONS:
+        raise ValueError(f'Unknown trend dimension "{dimension}"')
+
+    granularity = 'hour' if hours <= settings.TREND_HOURLY_RETENTION_DAYS * 24 else 'day'
+    since = trends.bucket_start(datetime.now(timezone.utc) - timedelta(hours=hours), granularity)
+
+    # The window start is part of the cache key, so cached results expire as time moves on.
+    return _get_top_queries_since(since, granularity, limit, dimension)
+
+
+@cached_stats
+def _get_top_queries_since(since: datetime, granularity: str, limit: int,
+                           dimension: str) -> list[tuple[str, int]]:
+    match = {'granularity': granularity, 'start': {'$gte': since}}
+    if granularity == 'day':
+        match = {'$or': [match, {'granularity': 'month', 'start': {'$gte': trends.bucket_start(since, 'month')}}]}
+
+    pipeline = [
+        {'$match': match},
+        {'$project': {'items': {'$objectToArray': {'$ifNull': [f'$counts.{dimension}', {}]}}}},
+        {'$unwind': '$items'},
+        {'$group': {'_id': '$items.k', 'count': {'$sum': '$items.v'}}},
+        {'$sort': {'count': -1, '_id': 1}},
+        {'$limit': limit}
+    ]
+
+    collection = settings.get_trend_collection()
+    return [(trends.decode_key(item['_id']), item['count']) for item in collection.aggregate(pipeline)]
+
+
+def get_trend_series(dimension: str = 'query_type', granularity: str = 'day',
+                     periods: int = 7) -> list[tuple[datetime, dict]]:
+    '''
+    Returns a time series of counts for a trend dimension, reading only the buckets.
+    Periods without any queries are included with empty counts.
+    Monthly periods are summed from daily buckets and from monthly buckets
+    produced by downsampling, so recent months are complete as well.
+    Args:
+        dimension (str): One of trends.DIMENSIONS. Defaults to 'query_type'.
+        granularity (str): 'hour', 'day' or 'month'. Defaults to 'day'.
+        periods (int): Number of most recent periods. Defaults to 7.
+                       Hourly series cannot go back past TREND_HOURLY_RETENTION_DAYS.
+    Returns:
+        List of tuples (period_start, {key: count}) in chronological order.
+    '''
+
+    if dimension not in trends.DIMENSIONS:
+        raise ValueError(f'Unknown trend dimension "{dimension}"')
+    if granularity not in trends.GRANULARITIES:
+        raise ValueError(f'Unknown granularity "{granularity}"')
+    if granularity == 'hour' and periods > settings.TREND_HOURLY_RETENTION_DAYS * 24:
+        raise ValueError('Hourly trends are only kept for '
+                         f'{settings.TREND_HOURLY_RETENTION_DAYS} days')
+
+    now = trends.bucket_start(datetime.now(timezone.utc), granularity)
+    starts = [now]
+    for _ in range(periods - 1):
+        starts.append(trends.bucket_start(starts[-1] - timedelta(hours=1), granularity))
+    starts.reverse()
+
+    # The current period start is part of the cache key, so the series moves on with time.
+    return _get_trend_series(dimension, granularity, tuple(starts))
+
+
+@cached_stats
+def _get_trend_series(dimension: str, granularity: str,
+                      starts: tuple[datetime, ...]) -> list[tuple[datetime, dict]]:
+    source = ['day', 'month'] if granularity == 'month' else [granularity]
+
+    collection = settings.get_trend_collection()
+    docs = collection.find(
+        {'granularity': {'$in': source}, 'start': {'$gte': starts[0]}},
+        projection={'start': 1, f'counts.{dimension}': 1}
+    )
+
+    by_start = collections.defaultdict(collections.Counter)
+    for doc in docs:
+        start = trends.bucket_start(doc['start'].replace(tzinfo=timezone.utc), granularity)
+        for key, count in doc.get('counts', {}).get(dimension, {}).items():
+            by_start[start][trends.decode_key(key)] += count
+
+    return [(start, dict(by_start.get(start, {}))) for start in starts]
+
+
+def _parameter_count_stages() -> list[dict]:
+    '''
+    Returns aggregation stages counting 'query_type.key:value' parameter items (see param_items).
+    '''
+
+    return [
+        {'$match': {'query_type': {'$nin': [None, '']}, 'params': {'$type': 'object'}}},
+        {'$project': {'query_type': 1, 'params': {'$objectToArray': '$params'}}},
+        {'$unwind': '$params'},
+        {'$match': {'params.k': {'$in': POSSIBLE_KEYS}, 'params.v': {'$nin': [None, '']}}},
+        {'$group': {
+            '_id': {'$toLower': {'$trim': {'input': {'$concat': [
+                '$query_type', '.', '$params.k', ':', {'$toString': '$params.v'}
+            ]}}}},
+            'count': {'$sum': 1}
+        }}
+    ]
+
+
+def _merge_top_parameters(collection, live_top: list[dict], live_limit: int, limit: int) -> list[tuple[str, int]]:
+    '''
+    Ranks parameters over live and archived logs exactly, given only the live top candidates.
+    An item outside the live candidates has at most as many live logs as the last candidate,
+    so only archived items that could still reach the top `limit` have their live count
+    looked up, in one extra aggregation.
+    '''
+
+    top = log_archive.archived_parameter_counts()
+    live = {item['_id']: item['count'] for item in live_top}
+    top.update(live)
+
+    if len(live_top) < live_limit:
+        return top.most_common(limit)
+
+    live_floor = live_top[-1]['count']
+    ranked = top.most_common(limit)
+    threshold = ranked[-1][1] if len(ranked) >= limit else 0
+    unknown = [key for key, count in top.items() if key not in live and count + live_floor >= threshold]
+
+    if unknown:
+        stages = _parameter_count_stages() + [{'$match': {'_id': {'$in': unknown}}}]
+        for item in collection.aggregate(stages, allowDiskUse=True):
+            top[item['_id']] += item['count']
+
+    return top.most_common(limit)
+
+
+def _get_dashboard_per_statistic(limit: int) -> dict:
+    '''
+    Builds the dashboard from the individual statistics functions, one query each.
+    Used on MongoDB servers older than 5.2, which lack $top/$topN.
+    '''
+
+    query_counts = get_query_counts()
+
+    return {
+        'generated_at': datetime.now(timezone.utc),
+        'top_parameters': get_top_queries(limit),
+        'last_queries': get_last_queries(limit),
+        'queries_by_type': {q_type: get_queries_by_type(q_type, limit) for q_type, _ in query_counts},
+        'query_counts': query_counts
+    }
+
+
+@cached_stats
+def get_dashboard(limit: int = 5) -> dict:
+    '''
+    Computes all query statistics in a single MongoDB round trip using $facet.
+    The live collection is scanned once and each facet derives one statistic from it;
+    every facet output is bounded by `limit` (using $top/$topN, MongoDB 5.2+), so the
+    result document stays small. On older servers the statistics are queried one by one.
+    Archived logs are merged in afterwards: counts come from the archive index, and
+    segments are only streamed when a list needs more rows. With archived logs, the top
+    parameters are ranked from the live top candidates (DASHBOARD_TOP_CANDIDATES per
+    requested item) plus the archived counts, with one extra lookup for archived items
+    that could still rank, so they match get_top_queries.
+    Args:
+        limit (int): Number of items in each list. Defaults to 5.
+    Returns:
+        Dict with keys:
+            'generated_at': UTC time of computation,
+            'top_parameters': list of (parameter_combination, count),
+            'last_queries': list of recent query documents,
+            'queries_by_type': {query_type: list of unique recent query documents},
+            'query_counts': list of [query_type, count] sorted by count descending.
+    '''
+
+    collection = settings.get_mongo_collection()
+    _ensure_indexes(collection)
+    archived = bool(log_archive.load_index())
+
+    top_limit = limit * DASHBOARD_TOP_CANDIDATES if archived else limit
+
+    pipeline = [
+        {'$facet': {
+            'top_parameters': _parameter_count_stages() + [
+                {'$sort': {'count': -1, '_id': 1}},
+                {'$limit': top_limit}
+            ],
+            'last_queries': [
+                {'$group': {
+                    '_id': None,
+                    'docs': {'$topN': {'n': limit, 'sortBy': {'timestamp': -1}, 'output': '$$ROOT'}}
+                }}
+            ],
+            'queries_by_type': [
+                {'$group': {
+                    '_id': {'query_type': '$query_type', 'params': '$params'},
+                    'doc': {'$top': {'sortBy': {'timestamp': -1}, 'output': '$$ROOT'}}
+                }},
+                {'$group': {
+                    '_id': '$_id.query_type',
+                    'docs': {'$topN': {'n': limit, 'sortBy': {'doc.timestamp': -1}, 'output': '$doc'}}
+                }}
+            ],
+            'query_counts': [
+                {'$group': {'_id': '$query_type', 'count': {'$sum': 1}}}
+            ]
+        }}
+    ]
+
+    try:
+        facets = next(collection.aggregate(pipeline, allowDiskUse=True))
+    except OperationFailure:
+        return _get_dashboard_per_statistic(limit)
+
+    last_queries = facets['last_queries'][0]['docs'] if facets['last_queries'] else []
+    by_type = {item['_id']: item['docs'] for item in facets['queries_by_type']}
+    counts = collections.Counter({item['_id']: item['count'] for item in facets['query_counts']})
+
+    if archived:
+        top_parameters = _merge_top_parameters(collection, facets['top_parameters'], top_limit, limit)
+        counts.update(log_archive.archived_query_counts())
+
+        if len(last_queries) < limit:
+            last_queries.extend(itertools.islice(log_archive.iter_archived(newest_first=True),
+                                                 limit - len(last_queries)))
+
+        for query_type in counts:
+            docs = by_type.setdefault(query_type, [])
+            if len(docs) < limit:
+                seen = {tuple(sorted((doc.get('params') or {}).items())) for doc in docs}
+                docs.extend(_unique_by_params(log_archive.iter_archived(query_type, newest_first=True),
+                                              limit - len(docs), seen))
+    else:
+        top_parameters = [(item['_id'], item['count']) for item in facets['top_parameters']]
+
+    query_counts = [[q_type, count] for q_type, count in counts.items()]
+    query_counts.sort(key=lambda x: x[1], reverse=True)
+
+    return {
+        'generated_at': datetime.now(timezone.utc),
+        'top_parameters': top_parameters,
+        'last_queries': last_queries,
+        'queries_by_type': by_type,
+        'query_counts': query_counts
+    }
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def dashboard_to_json(dashboard: dict) -> str:
+    '''
+    Serializes a dashboard payload (see get_dashboard) to JSON for monitoring.
+    ObjectIds are stored as strings and datetimes in ISO 8601 format.
+    '''
+
+    return json.dumps(dashboard, default=_json_default, ensure_ascii=False, indent=2)
+
+
+def export_dashboard(path: str) -> None:
+    '''
+    Writes the current dashboard payload as JSON to `path`.
+    '''
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(dashboard_to_json(get_dashboard()))
+
+
+def get_error_rates() -> list[dict]:
+    '''
+    Summarizes handler calls recorded in the structured event log.
+    Returns:
+        List of dicts with keys 'function', 'calls', 'errors', 'error_rate',
+        'avg_duration_ms' and 'top_exception', sorted by error count descending.
+        'avg_duration_ms' averages the timed calls only and is None for handlers
+        that are not timed (see errors.log_error).
+    '''
+
+    stats = {}
+
+    for entry in event_log.read_events('call'):
+        function = entry.get('function')
+        if not function:
+            continue
+
+        item = stats.setdefault(function, {
+            'calls': 0,
+            'errors': 0,
+            'timed_calls': 0,
+            'duration_ms': 0.0,
+            'exceptions': collections.Counter()
+        })
+        item['calls'] += 1
+        if entry.get('duration_ms') is not None:
+            item['timed_calls'] += 1
+            item['duration_ms'] += entry['duration_ms']
+        if entry.get('status') == 'error':
+            item['errors'] += 1
+            item['exceptions'][entry.get('exception_type')] += 1
+
+    summary = []
+    for function, item in stats.items():
+        top_exception = item['exceptions'].most_common(1)
+        summary.append({
+            'function': function,
+            'calls': item['calls'],
+            'errors': item['errors'],
+            'error_rate': item['errors'] / item['calls'],
+            'avg_duration_ms': item['duration_ms'] / item['timed_calls'] if item['timed_calls'] else None,
+            'top_exception': top_exception[0][0] if top_exception else None
+        })
 
-        results = list(collection.aggregate(pipeline))
-        counts = {item['_id']: item['count'] for item in results}
+    summary.sort(key=lambda x: (x['errors'], x['error_rate']), reverse=True)
+    return summary
 
-        data = [[q_type, count] for q_type, count in counts.items()]
-        data.sort(key=lambda x: x[1], reverse=True)
 
-        display_utils.display_sorted_query_counts_table(data)
+if __name__ == '__main__':
+    print(dashboard_to_json(get_dashboard()))
@@ -4,8 +4,13 @@ to MongoDB and displaying them in a tabular format.
 '''
 
 from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
 from tabulate import tabulate
 from . import settings
+from . import stats_cache
+from . import trends
+from . import log_spool
 
 POSSIBLE_KEYS = [
     'keyword',
@@ -18,9 +23,80 @@ POSSIBLE_KEYS = [
     'max_length'
 ]
 
+DUPLICATE_KEY_ERROR = 11000
+
+def param_items(doc: dict) -> list[str]:
+    '''
+    Returns the 'query_type.key:value' items of a query log's non-empty parameters.
+    doc: Query log document.
+    '''
+
+    query_type = doc.get('query_type')
+    params = doc.get('params', {})
+    if not query_type or not isinstance(params, dict):
+        return []
+
+    return [
+        f"{query_type}.{key}:{params.get(key)}".strip().lower()
+        for key in POSSIBLE_KEYS
+        if params.get(key) is not None and params.get(key) != ''
+    ]
+
+
+def write_logs(docs: list[dict]) -> None:
+    '''
+    Inserts query logs into MongoDB and updates the trend buckets.
+    Logs are inserted with `trended_at: None`, which is set to the server time once they
+    are counted in the trend buckets (stats_cache polls it to detect new statistics).
+    Logs whose `_id` already exists (re-ingested after a partial failure) are not inserted
+    again, but are still counted if their trend update did not complete.
+    docs: Query log documents with keys '_id', 'query_type', 'params', 'timestamp' and 'trended_at'.
+    '''
+
+    collection = settings.get_log_collection()
+    retry_error = None
+    try:
+        collection.insert_many(docs, ordered=False)
+        pending = docs
+    except BulkWriteError as e:
+        write_errors = e.details.get('writeErrors', [])
+        failed = {error['index'] for error in write_errors}
+        duplicates = {
+            docs[error['index']]['_id']
+            for error in write_errors
+            if error.get('code') == DUPLICATE_KEY_ERROR
+        }
+        if len(duplicates) < len(write_errors):
+            retry_error = e
+
+        untrended = set()
+        if duplicates:
+            untrended = {
+                doc['_id']
+                for doc in collection.find({'_id': {'$in': list(duplicates)}, 'trended_at': None}, {'_id': 1})
+            }
+        pending = [doc for i, doc in enumerate(docs) if i not in failed or doc['_id'] in untrended]
+
+    if pending:
+        trends.record_queries(pending, settings.get_log_trend_collection())
+        collection.update_many(
+            {'_id': {'$in': [doc['_id'] for doc in pending]}},
+            {'$currentDate': {'trended_at': True}}
+        )
+        stats_cache.bump_generation()
+
+    if retry_error is not None:
+        raise retry_error
+
+
+_dispatcher = log_spool.LogDispatcher(write_logs)
+
+
 def log_query(query_type: str, query_params: dict) -> None:
     '''
-    Writes a query log to MongoDB with fixed keys.
+    Queues a query log with fixed keys for writing to MongoDB.
+    Returns immediately: the log is written in the background, or spooled
+    to a local file while MongoDB is unavailable (see log_spool).
     query_type: Type of the query (e.g., 'genre_year', 'actor_partial', etc.).
     query_params: Dictionary with query parameters.
     '''
@@ -28,12 +104,12 @@ def log_query(query_type: str, query_params: dict) -> None:
     base_params = {key: None for key in POSSIBLE_KEYS}
     base_params.update(query_params)
 
-    collection = settings.get_mongo_collection()
-
-    collection.insert_one({
+    _dispatcher.submit({
+        '_id': ObjectId(),
         'query_type': query_type,
         'params': base_params,
-        'timestamp': datetime.now(timezone.utc)
+        'timestamp': datetime.now(timezone.utc),
+        'trended_at': None
     })
 
 
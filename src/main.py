@@ -5,6 +5,7 @@ Main module: запуск программы, обработка меню и п
 from . import display_utils
 from . import ui
 from . import settings
+from . import catalog
 
 def main() -> None:
     '''
@@ -27,6 +28,7 @@ def main() -> None:
     connection_query = None
     try:
         connection_query = settings.create_mysql_connection()
+        catalog.warm_up()
 
         message = '\nWelcome to the Sakila database movie search system.'
         print(display_utils.colorize(message, 'yellow'))
@@ -1,8 +1,12 @@
 '''
 Module for connecting to a MySQL database and executing queries on the film_extended_view.
 Contains functions to search films by various criteria and obtain statistics.
+Search functions return film.Film records built from a tuple cursor.
 '''
 
+from pymysql.cursors import Cursor
+from .film import Film, COLUMNS
+
 def search_by_keyword(conn, keyword, offset=0, limit=10):
     '''
     Search films by keyword in the title.
@@ -12,14 +16,14 @@ def search_by_keyword(conn, keyword, offset=0, limit=10):
     return: List of films matching the query.
     '''
 
-    with conn.cursor() as cursor:
+    with conn.cursor(Cursor) as cursor:
         query = (
-            'SELECT * FROM film_extended_view '
+            f'SELECT {COLUMNS} FROM film_extended_view '
             'WHERE UPPER(title) LIKE UPPER(%s) '
             'LIMIT %s OFFSET %s;'
         )
         cursor.execute(query, (f'%{keyword}%', limit, offset))
-        return cursor.fetchall()
+        return [Film.from_row(row) for row in cursor.fetchall()]
 
 
 def get_genres_and_year_range(conn):
@@ -53,15 +57,15 @@ def search_by_genre_and_years(conn, genre, year_from, year_to,*, offset=0, limit
     return: List of films matching the filter.
     '''
 
-    with conn.cursor() as cursor:
+    with conn.cursor(Cursor) as cursor:
         query = (
-            'SELECT * FROM film_extended_view '
+            f'SELECT {COLUMNS} FROM film_extended_view '
             'WHERE LOWER(category) = LOWER(%s) '
             'AND release_year BETWEEN %s AND %s '
             'LIMIT %s OFFSET %s;'
         )
         cursor.execute(query, (genre, year_from, year_to, limit, offset))
-        return cursor.fetchall()
+        return [Film.from_row(row) for row in cursor.fetchall()]
 
 
 def search_by_actor_name_partial(conn, name_part, offset=0, limit=10):
@@ -73,15 +77,15 @@ def search_by_actor_name_partial(conn, name_part, offset=0, limit=10):
     return: List of films where actor matches the name fragment.
     '''
 
-    with conn.cursor() as cursor:
+    with conn.cursor(Cursor) as cursor:
         query = (
-            'SELECT * FROM film_extended_view '
+            f'SELECT {COLUMNS} FROM film_extended_view '
             'WHERE UPPER(actors) LIKE UPPER(%s) '
             'LIMIT %s OFFSET %s;'
         )
         pattern = f'%{name_part}%'
         cursor.execute(query, (pattern, limit, offset))
-        return cursor.fetchall()
+        return [Film.from_row(row) for row in cursor.fetchall()]
 
 
 def get_length_range(conn):
@@ -110,11 +114,76 @@ def search_by_length_range(conn, length_from: int, length_to: int, offset=0, lim
     return: List of films matching the filter.
     '''
 
-    with conn.cursor() as cursor:
+    with conn.cursor(Cursor) as cursor:
         query = (
-            'SELECT * FROM film_extended_view '
+            f'SELECT {COLUMNS} FROM film_extended_view '
             'WHERE length BETWEEN %s AND %s '
             'LIMIT %s OFFSET %s;'
         )
         cursor.execute(query, (length_from, length_to, limit, offset))
-        return cursor.fetchall()
+        return [Film.from_row(row) for row in cursor.fetchall()]
+
+
+def get_film_titles(conn):
+    '''
+    Get the ID and title of every film.
+    return: List of (film_id, title) tuples.
+    '''
+
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT film_id, title FROM film_extended_view;')
+        return [(row['film_id'], row['title']) for row in cursor.fetchall()]
+
+
+def get_films_by_ids(conn, film_ids):
+    '''
+    Get films by their IDs, preserving the order of film_ids.
+    film_ids: List of film IDs.
+    return: List of films in the order of film_ids.
+    '''
+
+    if not film_ids:
+        return []
+
+    with conn.cursor(Cursor) as cursor:
+        placeholders = ', '.join(['%s'] * len(film_ids))
+        query = f'SELECT {COLUMNS} FROM film_extended_view WHERE film_id IN ({placeholders});'
+        cursor.execute(query, tuple(film_ids))
+        by_id = {film.film_id: film for film in map(Film.from_row, cursor.fetchall())}
+
+    return [by_id[film_id] for film_id in film_ids if film_id in by_id]
+
+
+def get_actor_names(conn):
+    '''
+    Get the distinct names of all actors appearing in films.
+    return: Sorted list of actor names ('FIRST LAST').
+    '''
+
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT actors FROM film_extended_view;')
+        names = {
+            name.strip()
+            for row in cursor.fetchall() if row['actors']
+            for name in row['actors'].split(',')
+        }
+    return sorted(names)
+
+
+def get_catalog_fingerprint(conn):
+    '''
+    Get the latest modification time and row count of every table behind film_extended_view.
+    Reads the base tables directly, which is much cheaper than aggregating the view.
+    return: Dict mapping table name to {'last_update': str, 'rows': int}.
+    '''
+
+    tables = ['film', 'actor', 'category', 'film_actor', 'film_category']
+    fingerprint = {}
+
+    with conn.cursor() as cursor:
+        for table in tables:
+            cursor.execute(f'SELECT MAX(last_update) AS last_update, COUNT(*) AS rows_count FROM {table};')
+            result = cursor.fetchone()
+            fingerprint[table] = {'last_update': str(result['last_update']), 'rows': result['rows_count']}
+
+    return fingerprint
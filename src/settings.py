@@ -23,10 +23,48 @@ DATABASE_MYSQL_W = {
 
 DATABASE_MYSQL_NAME = os.getenv('MYSQL_DATABASE')
 
+MONGO_TIMEOUT_MS = int(os.getenv('MONGO_TIMEOUT_MS', 500))
+MONGO_BREAKER_FAILURES = int(os.getenv('MONGO_BREAKER_FAILURES', 3))
+MONGO_BREAKER_RESET_SECONDS = float(os.getenv('MONGO_BREAKER_RESET_SECONDS', 30))
+
 MONGO_CLIENT = pymongo.MongoClient(os.getenv('MONGO_URI'))
 
 DATABASE_MONGO = MONGO_CLIENT[os.getenv('MONGO_DB')]
 MY_COLLECTION_MONGO = DATABASE_MONGO[os.getenv('MONGO_COLLECTION')]
+TREND_COLLECTION_MONGO = DATABASE_MONGO[os.getenv('MONGO_TREND_COLLECTION', 'query_trends')]
+
+# The background log writer uses its own client with tight timeouts, so an
+# unreachable server trips its circuit breaker quickly without shortening the
+# timeouts of statistics queries, change streams and archival jobs.
+LOG_MONGO_CLIENT = pymongo.MongoClient(
+    os.getenv('MONGO_URI'),
+    serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+    connectTimeoutMS=MONGO_TIMEOUT_MS
+)
+
+LOG_DATABASE_MONGO = LOG_MONGO_CLIENT[os.getenv('MONGO_DB')]
+LOG_COLLECTION_MONGO = LOG_DATABASE_MONGO[os.getenv('MONGO_COLLECTION')]
+LOG_TREND_COLLECTION_MONGO = LOG_DATABASE_MONGO[os.getenv('MONGO_TREND_COLLECTION', 'query_trends')]
+
+EVENT_LOG_ROTATION = os.getenv('EVENT_LOG_ROTATION', 'size')
+EVENT_LOG_MAX_BYTES = int(os.getenv('EVENT_LOG_MAX_BYTES', 5 * 1024 * 1024))
+EVENT_LOG_BACKUP_COUNT = int(os.getenv('EVENT_LOG_BACKUP_COUNT', 5))
+
+STATS_CACHE_MODE = os.getenv('STATS_CACHE_MODE', 'local')
+STATS_CACHE_POLL_SECONDS = float(os.getenv('STATS_CACHE_POLL_SECONDS', 0))
+
+TREND_HOURLY_RETENTION_DAYS = int(os.getenv('TREND_HOURLY_RETENTION_DAYS', 7))
+TREND_DAILY_RETENTION_DAYS = int(os.getenv('TREND_DAILY_RETENTION_DAYS', 365))
+TREND_QUERY_KEYS_PER_BUCKET = int(os.getenv('TREND_QUERY_KEYS_PER_BUCKET', 1000))
+
+CATALOG_SNAPSHOT_ENABLED = os.getenv('CATALOG_SNAPSHOT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+FUZZY_SEARCH_ENABLED = os.getenv('FUZZY_SEARCH_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+FUZZY_MIN_SCORE = float(os.getenv('FUZZY_MIN_SCORE', 0.6))
+FUZZY_LATENCY_BUDGET_MS = float(os.getenv('FUZZY_LATENCY_BUDGET_MS', 50))
+
+LOG_ARCHIVE_AFTER_DAYS = int(os.getenv('LOG_ARCHIVE_AFTER_DAYS', 90))
+LOG_ARCHIVE_SEGMENT_SIZE = int(os.getenv('LOG_ARCHIVE_SEGMENT_SIZE', 50000))
 
 
 def create_mysql_connection():
@@ -51,3 +89,36 @@ def get_mongo_collection():
         return MY_COLLECTION_MONGO
     except PyMongoError as e:
         raise PyMongoError(f'Error connecting to MongoDB Collection: {e}') from e
+
+
+def get_trend_collection():
+    '''
+    Returns a connection to the MongoDB collection with pre-aggregated trend buckets.
+    '''
+
+    try:
+        return TREND_COLLECTION_MONGO
+    except PyMongoError as e:
+        raise PyMongoError(f'Error connecting to MongoDB Collection: {e}') from e
+
+
+def get_log_collection():
+    '''
+    Returns the query log collection on the log writer's client with tight timeouts.
+    '''
+
+    try:
+        return LOG_COLLECTION_MONGO
+    except PyMongoError as e:
+        raise PyMongoError(f'Error connecting to MongoDB Collection: {e}') from e
+
+
+def get_log_trend_collection():
+    '''
+    Returns the trend bucket collection on the log writer's client with tight timeouts.
+    '''
+
+    try:
+        return LOG_TREND_COLLECTION_MONGO
+    except PyMongoError as e:
+        raise PyMongoError(f'Error connecting to MongoDB Collection: {e}') from e
@@ -0,0 +1,138 @@
+'''
+Module stats_cache provides a result cache for statistics functions.
+Cached results are invalidated by a generation counter that is bumped whenever
+a query log is written. When several processes write logs, the generation is
+also advanced by a MongoDB change stream ('watch' mode) or by polling the
+log count and the newest server-side `trended_at` ('poll' mode). Log _ids are
+assigned when a search runs, not when the log is written, so they cannot be polled.
+See STATS_CACHE_MODE in settings.
+'''
+
+import threading
+import time
+from functools import wraps
+from typing import Callable
+from pymongo import DESCENDING
+from pymongo.errors import PyMongoError
+from . import settings
+
+
+_lock = threading.Lock()
+_generation = 0
+_cache = {}
+_cache_generation = 0
+
+_last_marker = None
+_last_poll = 0.0
+_poll_index_ready = False
+_watch_thread = None
+_watch_failed = False
+
+
+def bump_generation() -> None:
+    '''
+    Marks all cached statistics as stale.
+    '''
+
+    global _generation
+
+    with _lock:
+        _generation += 1
+
+
+def _watch_inserts() -> None:
+    '''
+    Bumps the generation for every insert or update (late trend updates) seen on the log collection.
+    Falls back to polling if change streams are unavailable (e.g. standalone server).
+    '''
+
+    global _watch_failed
+
+    collection = settings.get_mongo_collection()
+    try:
+        with collection.watch([{'$match': {'operationType': {'$in': ['insert', 'update']}}}]) as stream:
+            for _ in stream:
+                bump_generation()
+    except PyMongoError:
+        _watch_failed = True
+        bump_generation()
+
+
+def _poll() -> None:
+    '''
+    Bumps the generation if the log count or the newest `trended_at` changed since the last poll.
+    Together they change on every insert, every late trend update and every archival run.
+    '''
+
+    global _last_marker, _last_poll, _poll_index_ready
+
+    now = time.monotonic()
+    if now - _last_poll < settings.STATS_CACHE_POLL_SECONDS:
+        return
+    _last_poll = now
+
+    collection = settings.get_mongo_collection()
+    if not _poll_index_ready:
+        collection.create_index([('trended_at', DESCENDING)])
+        _poll_index_ready = True
+
+    doc = collection.find_one({}, projection={'trended_at': 1}, sort=[('trended_at', -1)])
+    marker = (collection.estimated_document_count(), doc.get('trended_at') if doc else None)
+
+    if marker != _last_marker:
+        _last_marker = marker
+        bump_generation()
+
+
+def current_generation() -> int:
+    '''
+    Returns the current cache generation, checking for writes
+    from other processes according to STATS_CACHE_MODE.
+    '''
+
+    global _watch_thread
+
+    mode = settings.STATS_CACHE_MODE
+
+    if mode == 'watch' and not _watch_failed:
+        if _watch_thread is None:
+            _watch_thread = threading.Thread(target=_watch_inserts, daemon=True)
+            _watch_thread.start()
+    elif mode in ('watch', 'poll'):
+        _poll()
+
+    return _generation
+
+
+def cached_stats(func: Callable) -> Callable:
+    '''
+    Decorator caching a statistics function's result by its arguments
+    until the next generation bump.
+    '''
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        global _cache_generation
+
+        key = (func.__qualname__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return func(*args, **kwargs)
+
+        generation = current_generation()
+        with _lock:
+            if generation != _cache_generation:
+                _cache.clear()
+                _cache_generation = generation
+            if key in _cache:
+                return _cache[key]
+
+        result = func(*args, **kwargs)
+
+        with _lock:
+            if generation == _cache_generation:
+                _cache[key] = result
+        return result
+
+    return wrapper
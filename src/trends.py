@@ -0,0 +1,222 @@
+'''
+The trends module maintains time-bucketed, pre-aggregated counts of search queries
+in MongoDB. Every logged query increments an hourly and a daily bucket document;
+old buckets are downsampled by `downsample_buckets` (run with `python -m src.trends`).
+A length range search counts once in every length bucket the range covers.
+The free-text 'query' dimension keeps at most TREND_QUERY_KEYS_PER_BUCKET keys per
+bucket; counts for further new keys are summed in 'overflow.query'.
+
+Bucket document structure:
+    {
+        'granularity': 'hour' | 'day' | 'month',
+        'start': <bucket start, UTC>,
+        'counts': {
+            'query_type': {'keyword': 3, ...},
+            'genre': {'comedy': 1, ...},
+            'year_range': {'1990-1995': 1, ...},
+            'length': {'90-119': 2, ...},
+            'query': {'keyword%2Ekeyword:world': 1, ...}
+        },
+        'query_keys': <number of keys in counts.query>,
+        'overflow': {'query': <count of queries not kept in counts.query>}
+    }
+Counter keys are escaped with `encode_key`, since MongoDB field names cannot contain '.' or start with '$'.
+'''
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from urllib.parse import unquote
+from pymongo import ASCENDING, UpdateOne
+from . import settings
+
+
+DIMENSIONS = ['query_type', 'genre', 'year_range', 'length', 'query']
+GRANULARITIES = ['hour', 'day', 'month']
+LENGTH_BUCKET_MINUTES = 30
+
+_indexes_ready = False
+
+
+def encode_key(value) -> str:
+    '''
+    Escapes a counter key so it can be used as a MongoDB field name.
+    '''
+
+    return str(value).lower().replace('%', '%25').replace('.', '%2E').replace('$', '%24')
+
+
+def decode_key(key: str) -> str:
+    '''
+    Reverses `encode_key`.
+    '''
+
+    return unquote(key)
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    '''
+    Truncates a timestamp to the start of its hour, day or month bucket.
+    '''
+
+    start = timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity in ('day', 'month'):
+        start = start.replace(hour=0)
+    if granularity == 'month':
+        start = start.replace(day=1)
+    return start
+
+
+def query_dimensions(query_type: str, params: dict) -> dict:
+    '''
+    Derives the bucket counter keys for a single query log.
+    Args:
+        query_type (str): Type of the query.
+        params (dict): Query parameters with fixed keys (unused ones are None).
+    Returns:
+        Dict mapping dimension name to the list of encoded keys to increment.
+    '''
+
+    keys = {'query_type': [encode_key(query_type)]}
+
+    if params.get('genre'):
+        keys['genre'] = [encode_key(params['genre'])]
+
+    if params.get('year_from') is not None:
+        keys['year_range'] = [encode_key(f"{params['year_from']}-{params.get('year_to') or params['year_from']}")]
+
+    if params.get('min_length') is not None:
+        low = params['min_length'] // LENGTH_BUCKET_MINUTES * LENGTH_BUCKET_MINUTES
+        high = max(params['min_length'], params.get('max_length') or 0)
+        keys['length'] = [
+            encode_key(f'{start}-{start + LENGTH_BUCKET_MINUTES - 1}')
+            for start in range(low, high + 1, LENGTH_BUCKET_MINUTES)
+        ]
+
+    keys['query'] = [
+        encode_key(f'{query_type}.{key}:{value}'.strip())
+        for key, value in params.items()
+        if value is not None and value != ''
+    ]
+
+    return keys
+
+
+def _ensure_indexes(collection) -> None:
+    global _indexes_ready
+
+    if not _indexes_ready:
+        collection.create_index([('granularity', ASCENDING), ('start', ASCENDING)], unique=True)
+        _indexes_ready = True
+
+
+def _bucket_updates(granularity: str, start: datetime, increments: Counter) -> list[UpdateOne]:
+    '''
+    Returns the updates applying `increments` ('counts.<dimension>.<key>' to count) to a bucket.
+    The updates must be written in order: the first one upserts the bucket, then every
+    'query' key gets three mutually exclusive updates, incrementing the key if it exists,
+    adding it while the bucket holds fewer than TREND_QUERY_KEYS_PER_BUCKET keys,
+    or counting it in 'overflow.query' otherwise.
+    '''
+
+    bucket = {'granularity': granularity, 'start': start}
+    limit = settings.TREND_QUERY_KEYS_PER_BUCKET
+
+    fixed = {field: count for field, count in increments.items() if not field.startswith('counts.query.')}
+    updates = [UpdateOne(bucket, {'$inc': {**fixed, 'query_keys': 0}}, upsert=True)]
+
+    for field, count in increments.items():
+        if field.startswith('counts.query.'):
+            updates += [
+                UpdateOne({**bucket, field: {'$exists': True}}, {'$inc': {field: count}}),
+                UpdateOne({**bucket, field: {'$exists': False}, 'query_keys': {'$lt': limit}},
+                          {'$inc': {field: count, 'query_keys': 1}}),
+                UpdateOne({**bucket, field: {'$exists': False}, 'query_keys': {'$gte': limit}},
+                          {'$inc': {'overflow.query': count}})
+            ]
+
+    return updates
+
+
+def record_queries(docs: list[dict], collection=None) -> None:
+    '''
+    Increments the hourly and daily buckets for a batch of query logs in one round trip.
+    Increments are combined per bucket and sent in a single ordered bulk_write.
+    Args:
+        docs (list of dict): Query logs with keys 'query_type', 'params' and 'timestamp'.
+        collection (optional): Trend collection to write to. Defaults to get_trend_collection().
+    '''
+
+    if not docs:
+        return
+
+    buckets = {}
+    for doc in docs:
+        for dimension, keys in query_dimensions(doc['query_type'], doc['params']).items():
+            for key in keys:
+                for granularity in ('hour', 'day'):
+                    start = bucket_start(doc['timestamp'], granularity)
+                    buckets.setdefault((granularity, start), Counter())[f'counts.{dimension}.{key}'] += 1
+
+    if collection is None:
+        collection = settings.get_trend_collection()
+    _ensure_indexes(collection)
+
+    collection.bulk_write([
+        update
+        for (granularity, start), increments in buckets.items()
+        for update in _bucket_updates(granularity, start, increments)
+    ])
+
+
+def downsample_buckets(now: datetime = None) -> dict:
+    '''
+    Downsamples old buckets:
+    - hourly buckets older than TREND_HOURLY_RETENTION_DAYS are removed,
+      since the daily buckets already hold the same counts;
+    - daily buckets older than TREND_DAILY_RETENTION_DAYS are merged
+      into monthly buckets and removed.
+    Args:
+        now (datetime, optional): Reference time (UTC). Defaults to the current time.
+    Returns:
+        Dict with the number of removed hourly and merged daily buckets.
+    '''
+
+    now = now or datetime.now(timezone.utc)
+    collection = settings.get_trend_collection()
+    _ensure_indexes(collection)
+
+    hour_cutoff = bucket_start(now - timedelta(days=settings.TREND_HOURLY_RETENTION_DAYS), 'hour')
+    removed = collection.delete_many({'granularity': 'hour', 'start': {'$lt': hour_cutoff}})
+
+    day_cutoff = bucket_start(now - timedelta(days=settings.TREND_DAILY_RETENTION_DAYS), 'month')
+    old_days = list(collection.find({'granularity': 'day', 'start': {'$lt': day_cutoff}}))
+
+    months = {}
+    for doc in old_days:
+        month = months.setdefault(bucket_start(doc['start'], 'month'), Counter())
+        for dimension, counts in doc.get('counts', {}).items():
+            for key, count in counts.items():
+                month[f'counts.{dimension}.{key}'] += count
+        for dimension, count in doc.get('overflow', {}).items():
+            month[f'overflow.{dimension}'] += count
+
+    for month in months.values():
+        # Keep the most frequent query keys of the month; the rest goes to the overflow.
+        queries = Counter({field: count for field, count in month.items() if field.startswith('counts.query.')})
+        for field, count in queries.most_common()[settings.TREND_QUERY_KEYS_PER_BUCKET:]:
+            del month[field]
+            month['overflow.query'] += count
+
+    if months:
+        collection.bulk_write([
+            update
+            for start, increments in months.items()
+            for update in _bucket_updates('month', start, increments)
+        ])
+        collection.delete_many({'_id': {'$in': [doc['_id'] for doc in old_days]}})
+
+    return {'hour_removed': removed.deleted_count, 'day_merged': len(old_days)}
+
+
+if __name__ == '__main__':
+    print(downsample_buckets())
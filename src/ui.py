@@ -4,13 +4,16 @@ displaying menus, requesting input data, and showing results in the console.
 '''
 
 from . import mysql_connector
+from . import fuzzy_search
+from . import autocomplete
+from . import catalog
 from . import log_writer
 from . import log_stats
 from . import display_utils
 from . import errors
 
 
-@errors.log_error(display=True)
+@errors.log_error(display=True, timed=False)
 def main_menu():
     '''Displays the main menu and returns the user's choice.'''
 
@@ -29,7 +32,7 @@ def main_menu():
         print('\nInvalid choice. Please try again.')
 
 
-@errors.log_error(display=True)
+@errors.log_error(display=True, timed=False)
 def confirm_exit(conn):
     '''Asks the user to confirm program exit.'''
 
@@ -39,7 +42,7 @@ def confirm_exit(conn):
     return input('Your choice: ').strip()
 
 
-@errors.log_error(display=True)
+@errors.log_error(display=True, timed=False)
 def handle_search_menu(conn) -> None:
     '''Displays the film search menu and handles user choice of search type.'''
 
@@ -67,14 +70,14 @@ def handle_search_menu(conn) -> None:
         print('Invalid search method selection.')
 
 
-@errors.log_error(display=True)
+@errors.log_error(display=True, timed=False)
 def handle_keyword_search(conn) -> None:
     '''Prompts user for keyword and handles search by keyword with pagination.'''
 
-    keyword = input('\nEnter a keyword to search in film titles: ').strip()
+    keyword = autocomplete.prompt(f'\nEnter a keyword to search in film titles {autocomplete.HINT}: ', conn, 'title').strip()
     offset = 0
     while True:
-        results = mysql_connector.search_by_keyword(conn, keyword, offset)
+        results = fuzzy_search.search_by_keyword(conn, keyword, offset)
         log_writer.log_query('keyword', {'keyword': keyword})
         if handle_pagination(results, offset, display_utils.display_films_table):
             offset += 10
@@ -82,13 +85,13 @@ def handle_keyword_search(conn) -> None:
             break
 
 
-@errors.log_error(display=True)
+@errors.log_error(display=True, timed=False)
 def handle_actor_search(conn) -> None:
     '''Prompts user for actor's first and last name, then handles search with pagination.'''
 
     print(f'{display_utils.colorize("\nEnter actor details for search (can be left empty):", "yellow")}\n')
-    first_name = input(f'{display_utils.colorize("Actor first name: ", "blue")}').strip()
-    last_name = input(f'{display_utils.colorize("Actor last name: ", "blue")}').strip()
+    first_name = autocomplete.prompt(f'{display_utils.colorize("Actor first name: ", "blue")}', conn, 'first_name').strip()
+    last_name = autocomplete.prompt(f'{display_utils.colorize("Actor last name: ", "blue")}', conn, 'last_name').strip()
 
     name_part = f'{first_name} {last_name}'.strip() or first_name or last_name
 
@@ -106,23 +109,27 @@ def handle_actor_search(conn) -> None:
             break
 
 
-@errors.log_error(display=True)
+@errors.log_error(display=True, timed=False)
 def handle_genre_year_search(conn) -> None:
     '''Prompts user for genre and year range, then handles search with pagination.'''
 
-    genres, min_year, max_year = mysql_connector.get_genres_and_year_range(conn)
+    genres, min_year, max_year = catalog.get_genres_and_year_range(conn)
 
     print(f'{display_utils.colorize("\nGenres in the database:", "yellow")}\n')
     for g in genres:
         print(f'- {display_utils.colorize(g, "blue")}')
     print(f'\n{display_utils.colorize(f"Available years: from {min_year} to {max_year}", "yellow")}\n')
 
+    genres_by_name = {g.casefold(): g for g in genres}
     while True:
-        genre = input('Enter genre: ').strip()
-        if genre not in genres:
-            print('\nInvalid genre. Please try again.')
-            continue
-        break
+        genre = autocomplete.prompt(f'Enter genre {autocomplete.HINT}: ', conn, 'genre').strip()
+        if genre.casefold() in genres_by_name:
+            genre = genres_by_name[genre.casefold()]
+            break
+        print('\nInvalid genre. Please try again.')
+        suggestions = fuzzy_search.closest_matches(genre, genres)
+        if suggestions:
+            print(f'Did you mean: {", ".join(suggestions)}?')
 
     while True:
         try:
@@ -156,11 +163,11 @@ def handle_genre_year_search(conn) -> None:
             break
 
 
-@errors.log_error(display=True)
+@errors.log_error(display=True, timed=False)
 def handle_length_search(conn) -> None:
     '''Handles search by movie length with pagination.'''
 
-    min_len_db, max_len_db = mysql_connector.get_length_range(conn)
+    min_len_db, max_len_db = catalog.get_length_range(conn)
     print(display_utils.colorize(
         f'\nAvailable movie length range: from {min_len_db} to {max_len_db} minutes.',
         'yellow'
@@ -223,7 +230,7 @@ def handle_pagination(results: list, offset: int, display_function: callable) ->
     return choice == '1'
 
 
-@errors.log_error(display=True)
+@errors.log_error(display=True, timed=False)
 def handle_stat_menu() -> None:
     '''Displays the statistics menu and handles user choice.'''
 
@@ -231,7 +238,11 @@ def handle_stat_menu() -> None:
     print(f'{display_utils.colorize("1. Top 5 popular queries", "blue")}')
     print(f'{display_utils.colorize("2. Last 5 queries", "blue")}')
     print(f'{display_utils.colorize("3. Search queries by type", "blue")}')
-    print(f'{display_utils.colorize("4. Frequency by query type", "blue")}\n')
+    print(f'{display_utils.colorize("4. Frequency by query type", "blue")}')
+    print(f'{display_utils.colorize("5. Handler error rates", "blue")}')
+    print(f'{display_utils.colorize("6. Search trends", "blue")}')
+    print(f'{display_utils.colorize("7. Dashboard (all statistics)", "blue")}')
+    print(f'{display_utils.colorize("8. Export dashboard to JSON", "blue")}\n')
 
     stat_choice = input('Choose an option: ').strip()
 
@@ -254,5 +265,30 @@ def handle_stat_menu() -> None:
     elif stat_choice == '4':
         log_stats.handle_query_count(show=True)
 
+    elif stat_choice == '5':
+        rates = log_stats.get_error_rates()
+        print('\nHandler error rates:')
+        display_utils.display_error_rates(rates)
+
+    elif stat_choice == '6':
+        days_input = input('Enter number of days (leave empty for 7): ').strip()
+        days = int(days_input) if days_input.isdigit() and int(days_input) > 0 else 7
+
+        top = log_stats.get_top_queries_in_window(hours=days * 24)
+        print(f'\nTop 5 parameters in the last {days} days:')
+        display_utils.display_top_parameters(top)
+
+        series = log_stats.get_trend_series('query_type', 'day', periods=days)
+        print('\nQueries per day by type:')
+        display_utils.display_trend_series(series, 'day')
+
+    elif stat_choice == '7':
+        display_utils.display_dashboard(log_stats.get_dashboard())
+
+    elif stat_choice == '8':
+        path = input('Enter output file (leave empty for dashboard.json): ').strip() or 'dashboard.json'
+        log_stats.export_dashboard(path)
+        print(f'\nDashboard exported to {path}.')
+
     else:
         print('Invalid choice.')
@@ -0,0 +1,291 @@
+'''
+Tests for log_spool (circuit breaker, spool and re-ingest) and the duplicate-key
+handling in log_writer.write_logs. MongoDB is replaced by injected write callables
+and fake collections. Run from the project root with `python -m unittest discover -s tests`.
+'''
+
+import os
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+os.environ.setdefault('MONGO_DB', 'test')
+os.environ.setdefault('MONGO_COLLECTION', 'query_logs')
+
+from bson import ObjectId
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from src import log_spool
+from src import log_writer
+
+
+def make_log(query_type: str = 'keyword') -> dict:
+    return {
+        '_id': ObjectId(),
+        'query_type': query_type,
+        'params': {'keyword': query_type},
+        'timestamp': datetime.now(timezone.utc),
+        'trended_at': None
+    }
+
+
+class FailingWrite:
+    '''
+    Write callable recording delivered logs; raises the queued errors first.
+    '''
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.written = []
+        self.calls = 0
+
+    def __call__(self, docs: list[dict]) -> None:
+        self.calls += 1
+        if self.errors:
+            error = self.errors.pop(0)
+            if error is not None:
+                raise error
+        self.written.extend(docs)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(log_spool.time, 'monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = log_spool.CircuitBreaker(failure_threshold=2, reset_seconds=30)
+
+    def test_opens_after_threshold_failures(self):
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_after_reset_then_closes_on_success(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now += 30
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, 'half_open')
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+
+    def test_failure_in_half_open_reopens(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now += 30
+        self.breaker.allow()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+        self.assertFalse(self.breaker.allow())
+
+
+class LogDispatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.spool_file = Path(directory.name) / 'query_spool.jsonl'
+        self.corrupt_file = self.spool_file.with_suffix('.corrupt')
+        self.replay_file = self.spool_file.with_suffix('.replay')
+
+        patcher = mock.patch.object(log_spool.event_log, 'log_event')
+        self.log_event = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def dispatcher(self, write, failure_threshold: int = 1) -> log_spool.LogDispatcher:
+        breaker = log_spool.CircuitBreaker(failure_threshold, reset_seconds=0)
+        return log_spool.LogDispatcher(write, spool_file=self.spool_file, breaker=breaker)
+
+    def spooled(self, path: Path = None) -> list[dict]:
+        path = path or self.spool_file
+        if not path.exists():
+            return []
+        with open(path, encoding='utf-8') as f:
+            return [log_spool._decode(line) for line in f if line.strip()]
+
+    def test_encode_decode_round_trip(self):
+        doc = make_log()
+        self.assertEqual(log_spool._decode(log_spool._encode(doc)), doc)
+
+    def test_failed_write_is_spooled_and_reingested_in_order(self):
+        write = FailingWrite(AutoReconnect('down'))
+        dispatcher = self.dispatcher(write)
+        first, second = make_log('a'), make_log('b')
+
+        dispatcher._deliver([first])
+        self.assertEqual(dispatcher.breaker.state, 'open')
+        self.assertEqual(self.spooled(), [first])
+
+        dispatcher._deliver([second])
+        self.assertEqual(write.written, [first, second])
+        self.assertEqual(dispatcher.breaker.state, 'closed')
+        self.assertFalse(self.spool_file.exists())
+        self.assertFalse(self.replay_file.exists())
+
+    def test_open_breaker_spools_without_writing(self):
+        write = FailingWrite(AutoReconnect('down'))
+        dispatcher = self.dispatcher(write)
+        dispatcher.breaker.reset_seconds = 60
+        dispatcher._deliver([make_log('a')])
+        dispatcher._deliver([make_log('b')])
+
+        self.assertEqual(write.calls, 1)
+        self.assertEqual([doc['query_type'] for doc in self.spooled()], ['a', 'b'])
+
+    def test_reingest_failure_respools_remaining_batches(self):
+        docs = [make_log(str(i)) for i in range(5)]
+        dispatcher = self.dispatcher(FailingWrite())
+        dispatcher._spool(docs)
+
+        write = FailingWrite(None, AutoReconnect('down'))
+        dispatcher._write = write
+        with mock.patch.object(log_spool, 'REINGEST_BATCH_SIZE', 2):
+            dispatcher._deliver([])
+
+        self.assertEqual(write.written, docs[:2])
+        self.assertEqual(self.spooled(), docs[2:])
+        self.assertFalse(self.replay_file.exists())
+
+    def test_torn_line_is_quarantined(self):
+        valid = make_log()
+        dispatcher = self.dispatcher(FailingWrite())
+        dispatcher._spool([valid])
+        with open(self.spool_file, 'a', encoding='utf-8') as f:
+            f.write('{"query_type": "keyw\n')
+
+        dispatcher._deliver([])
+
+        self.assertEqual(dispatcher._write.written, [valid])
+        self.assertEqual(self.corrupt_file.read_text(encoding='utf-8'), '{"query_type": "keyw\n')
+        self.assertFalse(self.replay_file.exists())
+        self.assertEqual(self.log_event.call_args.kwargs['stage'], 'decode')
+
+    def test_batch_rejected_with_other_error_is_quarantined(self):
+        doc = make_log()
+        dispatcher = self.dispatcher(FailingWrite())
+        dispatcher._spool([doc])
+        dispatcher._write = FailingWrite(TypeError('cannot encode'))
+
+        dispatcher._deliver([])
+        dispatcher._deliver([])
+
+        self.assertEqual(dispatcher._write.calls, 1)
+        self.assertEqual(self.spooled(self.corrupt_file), [doc])
+        self.assertFalse(self.replay_file.exists())
+
+    def test_unexpected_error_spools_and_keeps_running(self):
+        doc = make_log()
+        dispatcher = self.dispatcher(FailingWrite(RuntimeError('bug')))
+
+        dispatcher._deliver_safely([doc])
+
+        self.assertEqual(self.spooled(), [doc])
+        self.assertEqual(self.log_event.call_args.kwargs['stage'], 'deliver')
+
+    def test_background_thread_delivers_and_restarts(self):
+        write = FailingWrite()
+        dispatcher = self.dispatcher(write)
+        dead = threading.Thread(target=lambda: None)
+        dead.start()
+        dead.join()
+        dispatcher._thread = dead
+
+        doc = make_log()
+        dispatcher.submit(doc)
+        self.assertIsNot(dispatcher._thread, dead)
+        dispatcher.stop()
+
+        self.assertEqual(write.written, [doc])
+
+
+class FakeLogCollection:
+    '''
+    In-memory stand-in for the log collection used by write_logs.
+    '''
+
+    def __init__(self, fail_ids=()):
+        self.docs = {}
+        self.fail_ids = set(fail_ids)
+
+    def insert_many(self, docs, ordered=True):
+        errors = []
+        for i, doc in enumerate(docs):
+            if doc['_id'] in self.fail_ids:
+                errors.append({'index': i, 'code': 121})
+            elif doc['_id'] in self.docs:
+                errors.append({'index': i, 'code': log_writer.DUPLICATE_KEY_ERROR})
+            else:
+                self.docs[doc['_id']] = dict(doc)
+        if errors:
+            raise BulkWriteError({'writeErrors': errors})
+
+    def find(self, query, projection=None):
+        ids = query['_id']['$in']
+        return [{'_id': _id} for _id in ids if self.docs[_id]['trended_at'] is None]
+
+    def update_many(self, query, update):
+        for _id in query['_id']['$in']:
+            self.docs[_id]['trended_at'] = datetime.now(timezone.utc)
+
+
+class WriteLogsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = FakeLogCollection()
+        self.trended = []
+        self.trend_errors = []
+
+        def record_queries(docs, collection=None):
+            if self.trend_errors:
+                raise self.trend_errors.pop(0)
+            self.trended.extend(doc['query_type'] for doc in docs)
+
+        for patcher in (
+            mock.patch.object(log_writer.settings, 'get_log_collection', lambda: self.collection),
+            mock.patch.object(log_writer.settings, 'get_log_trend_collection', lambda: None),
+            mock.patch.object(log_writer.trends, 'record_queries', record_queries),
+            mock.patch.object(log_writer.stats_cache, 'bump_generation')
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_reingested_duplicates_are_not_counted_twice(self):
+        docs = [make_log('a'), make_log('b')]
+        log_writer.write_logs(docs[:1])
+        log_writer.write_logs(docs)
+
+        self.assertEqual(self.trended, ['a', 'b'])
+        self.assertEqual(len(self.collection.docs), 2)
+
+    def test_failed_trend_update_is_retried_for_duplicates(self):
+        docs = [make_log('a'), make_log('b')]
+        self.trend_errors.append(AutoReconnect('timeout'))
+
+        with self.assertRaises(AutoReconnect):
+            log_writer.write_logs(docs)
+        log_writer.write_logs(docs)
+        log_writer.write_logs(docs)
+
+        self.assertEqual(self.trended, ['a', 'b'])
+
+    def test_other_write_errors_are_raised_after_counting_inserted_logs(self):
+        docs = [make_log('a'), make_log('b')]
+        self.collection.fail_ids.add(docs[1]['_id'])
+
+        with self.assertRaises(BulkWriteError):
+            log_writer.write_logs(docs)
+
+        self.assertEqual(self.trended, ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()